@@ -0,0 +1,414 @@
+import os
+from array import array
+import tempfile
+import unittest
+import chessEngine
+import chessTables
+import chessMagic
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+KIWIPETE_FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+class TestBitboards(unittest.TestCase):
+
+    def test_start_bitboards(self):
+        board = chessEngine.Board()
+        self.assertEqual(board.bitboards[chessEngine.WHITE][chessEngine.PAWN], chessEngine.RANK_2)
+        self.assertEqual(board.bitboards[chessEngine.BLACK][chessEngine.KING], 1 << 60)
+        self.assertEqual(board.occupancy(), 0xFFFF00000000FFFF)
+
+    def test_FEN_round_trip(self):
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        copy = chessEngine.Board.from_bitboards(board.bitboards, board.active_color)
+        self.assertEqual(copy.get_FEN(), board.get_FEN())
+        self.assertTrue(board.get_FEN().startswith(KIWIPETE_FEN.split()[0] + " w"))
+
+    def test_start_move_count(self):
+        self.assertEqual(len(chessEngine.Board.from_FEN(START_FEN).all_moves()), 20)
+
+    def test_bitboards_follow_move_piece(self):
+        board = chessEngine.Board.from_FEN("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        board.move_piece(board.get_piece_arr()[0][4], chessEngine.Position(0, 6))
+        self.assertEqual(board.bitboards, chessEngine.Board.bitboards_from_pieces(board.pieces))
+        self.assertEqual(board.bitboards[chessEngine.WHITE][chessEngine.ROOK], 1 | 1 << 5)
+
+
+class TestMakeMove(unittest.TestCase):
+
+    def test_unmake_restores_every_move(self):
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        fen, bitboards, key = board.get_FEN(), [bb[:] for bb in board.bitboards], board.key
+        for move in board.all_moves():
+            board.make_move(move)
+            self.assertEqual(board.bitboards, chessEngine.Board.bitboards_from_pieces(board.pieces))
+            board.unmake_move()
+            self.assertEqual((board.get_FEN(), board.bitboards, board.key), (fen, bitboards, key))
+
+    def test_castling_moves_rook(self):
+        board = chessEngine.Board.from_FEN("r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1")
+        board.make_move(board.move_from_uci("e8c8"))
+        self.assertEqual(board.get_FEN().split()[0], "2kr3r/8/8/8/8/8/8/R3K2R")
+        board.unmake_move()
+        self.assertTrue(board.mailbox[56].first_move and board.mailbox[60].first_move)
+        self.assertEqual(board.get_FEN().split()[0], "r3k2r/8/8/8/8/8/8/R3K2R")
+
+    def test_promotion_is_undone(self):
+        board = chessEngine.Board.from_FEN("1r5k/P7/8/8/8/8/8/K7 w - - 0 1")
+        pawn = board.mailbox[48]
+        board.make_move(board.move_from_uci("a7b8"))
+        self.assertEqual((pawn.kind, pawn.value), (chessEngine.QUEEN, 9))
+        board.unmake_move()
+        self.assertEqual((pawn.kind, pawn.value, pawn.position), (chessEngine.PAWN, 1, chessEngine.Position(6, 0)))
+        self.assertEqual(board.mailbox[57].name, "rook")
+
+    def test_null_move(self):
+        fen = "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1"
+        board = chessEngine.Board.from_FEN(fen)
+        board.make_null_move()
+        self.assertEqual(board.get_FEN(), "4k3/8/8/3pP3/8/8/8/4K3 b - - 1 1")
+        self.assertEqual(board.key, board.compute_key())
+        board.unmake_null_move()
+        self.assertEqual((board.get_FEN(), board.key), (fen, chessEngine.Board.from_FEN(fen).key))
+
+
+class TestGameStatus(unittest.TestCase):
+
+    def status(self, fen):
+        return chessEngine.Board.from_FEN(fen).game_status()
+
+    def test_statuses(self):
+        self.assertEqual(self.status(START_FEN), chessEngine.ONGOING)
+        self.assertEqual(self.status("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3"),
+                         chessEngine.CHECKMATE)
+        self.assertEqual(self.status("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"), chessEngine.STALEMATE)
+        self.assertEqual(self.status("4k3/8/8/8/8/8/4q3/4K3 w - - 0 1"), chessEngine.CHECK)
+        self.assertEqual(self.status("4k3/8/8/8/8/8/8/4R3 w - - 0 1"), chessEngine.KING_CAPTURED)
+        self.assertEqual(self.status("4k3/8/8/8/8/8/8/R3K3 w - - 100 80"), chessEngine.FIFTY_MOVE_DRAW)
+
+    def test_insufficient_material(self):
+        self.assertEqual(self.status("4k3/8/8/8/8/8/8/2B1K3 w - - 0 1"), chessEngine.INSUFFICIENT_MATERIAL)
+        self.assertEqual(self.status("4kb2/8/8/8/8/8/8/2B1K3 w - - 0 1"), chessEngine.INSUFFICIENT_MATERIAL)
+        self.assertEqual(self.status("2b1k3/8/8/8/8/8/8/2B1K3 w - - 0 1"), chessEngine.ONGOING)
+        self.assertEqual(self.status("4k3/8/8/8/8/8/8/1NN1K3 w - - 0 1"), chessEngine.ONGOING)
+
+    def test_king_squares_and_clocks(self):
+        board = chessEngine.Board.from_FEN("r3k2r/8/8/8/8/8/4P3/R3K2R b KQkq - 7 20")
+        self.assertEqual(board.king_square, [4, 60])
+        board.make_move(board.move_from_uci("e8g8"))
+        self.assertEqual((board.king_square[chessEngine.BLACK], board.halfmove_clock, board.fullmove_number),
+                         (62, 8, 21))
+        board.make_move(board.move_from_uci("e2e4"))
+        self.assertTrue(board.get_FEN().endswith(" 0 21"))
+        board.unmake_move()
+        board.unmake_move()
+        self.assertEqual(board.get_FEN(), "r3k2r/8/8/8/8/8/4P3/R3K2R b KQkq - 7 20")
+
+
+class TestStagedMoves(unittest.TestCase):
+
+    def test_same_moves_as_legal_moves(self):
+        for fen in (START_FEN, KIWIPETE_FEN, "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+                    "4k3/8/8/8/8/8/4r3/R3K2R w KQ - 0 1"):
+            board = chessEngine.Board.from_FEN(fen)
+            staged = list(board.staged_moves())
+            self.assertEqual(sorted(staged), sorted(board.legal_moves()))
+            self.assertIsInstance(board.all_moves(), array)
+            self.assertEqual(len(staged), len(board.legal_moves()))
+
+    def test_stage_order(self):
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        hash_move, killer = board.move_from_uci("a1b1"), board.move_from_uci("a2a4")
+        moves = [chessEngine.move_to_uci(move) for move in
+                 board.staged_moves(hash_move, [killer, board.move_from_uci("e5f7")])]
+        captures = board.all_captures()
+        self.assertEqual(moves[0], "a1b1")
+        self.assertEqual(moves[1], "e2a6")  # bishop takes bishop
+        self.assertEqual(moves[len(captures)], "f3h3")  # queen takes pawn, the last capture
+        self.assertEqual(moves[len(captures) + 1], "a2a4")  # the capture in the killers is not repeated
+        self.assertEqual(moves.count("a1b1"), 1)
+
+    def test_history_orders_quiet_moves(self):
+        board = chessEngine.Board.from_FEN(START_FEN)
+        history = [0] * 4096
+        history[board.move_from_uci("g1f3") & 4095] = 50
+        history[board.move_from_uci("b1c3") & 4095] = 10
+        history[board.move_from_uci("a2a3") & 4095] = -5
+        moves = [chessEngine.move_to_uci(move) for move in board.staged_moves(history=history)]
+        self.assertEqual(moves[:2], ["g1f3", "b1c3"])
+        self.assertEqual(moves[-1], "a2a3")
+        self.assertEqual(len(moves), 20)
+
+    def test_generation_is_lazy(self):
+        board = chessEngine.Board.from_FEN(START_FEN)
+        calls = []
+        piece_targets = board.piece_targets
+        board.piece_targets = lambda *args: calls.append(args) or piece_targets(*args)
+        next(board.staged_moves(board.move_from_uci("e2e4")), None)
+        self.assertEqual(len(calls), 1)  # only the hash move was checked
+
+    def test_invalid_hash_move_is_skipped(self):
+        board = chessEngine.Board.from_FEN(START_FEN)
+        move = chessEngine.pack_move(27, 35)  # d4d5, there is no piece on d4
+        self.assertNotIn(move, list(board.staged_moves(move)))
+
+    def test_captures_and_promotions(self):
+        board = chessEngine.Board.from_FEN("k2r4/2P5/8/8/8/5p2/6P1/K7 w - - 0 1")
+        captures = [chessEngine.move_to_uci(move) for move in board.ordered_captures()]
+        self.assertEqual(captures[0], "c7d8q")
+        self.assertEqual(sorted(captures[1:4]), ["c7d8b", "c7d8n", "c7d8r"])
+        self.assertEqual(captures[4:], ["g2f3"])
+        captures = [chessEngine.move_to_uci(move) for move in board.ordered_captures(promotions=True)]
+        self.assertEqual(captures[:2], ["c7d8q", "c7c8q"])
+        self.assertEqual((len(captures), captures[-1]), (9, "g2f3"))
+
+
+class TestStaticExchange(unittest.TestCase):
+
+    def see(self, fen, uci):
+        board = chessEngine.Board.from_FEN(fen)
+        return board.see(board.move_from_uci(uci))
+
+    def test_exchanges(self):
+        self.assertEqual(self.see("1k1r4/1pp4p/p7/4p3/8/P5P1/1PP4P/2K1R3 w - - 0 1", "e1e5"), 100)
+        # the rook and queen behind the bishop join in after it
+        self.assertEqual(self.see("1k1r3q/1ppn3p/p4b2/4p3/8/P2N2P1/1PP1R1BP/2K1Q3 w - - 0 1", "d3e5"), -230)
+        self.assertEqual(self.see("4k3/3r4/8/3p4/8/8/3Q4/3RK3 w - - 0 1", "d2d5"), -300)
+        self.assertEqual(self.see("4k3/3r4/8/3p4/8/8/3R4/3QK3 w - - 0 1", "d2d5"), 100)
+
+    def test_king_and_promotion(self):
+        self.assertEqual(self.see("8/8/2k5/3p4/8/8/8/3RK3 w - - 0 1", "d1d5"), -400)
+        self.assertEqual(self.see("8/8/2k5/3p4/4K3/8/8/3R4 w - - 0 1", "d1d5"), 100)  # the king may not retake
+        self.assertEqual(self.see("7k/2P5/8/8/8/8/8/K1r5 w - - 0 1", "c7c8q"), -100)
+        self.assertEqual(self.see("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6"), 100)
+
+
+class TestLegalMoves(unittest.TestCase):
+
+    def uci(self, board, moves):
+        return sorted(chessEngine.move_to_uci(move) for move in moves)
+
+    def assert_matches_filtered_all_moves(self, board):
+        legal = []
+        for move in board.all_moves():
+            board.make_move(move)
+            if not board.in_check(board.side ^ 1):
+                legal.append(move)
+            board.unmake_move()
+        self.assertEqual(sorted(board.legal_moves()), sorted(legal))
+        self.assertEqual(sorted(board.legal_captures()), sorted(move for move in legal if move >> 14 & 1))
+
+    def test_matches_filtered_all_moves(self):
+        for fen in (START_FEN, KIWIPETE_FEN, "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"):
+            board = chessEngine.Board.from_FEN(fen)
+            for move in board.legal_moves():
+                board.make_move(move)
+                self.assert_matches_filtered_all_moves(board)
+                board.unmake_move()
+
+    def test_pinned_piece_stays_on_the_line(self):
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/4r3/8/4R3/4K3 w - - 0 1")
+        moves = self.uci(board, board.legal_moves())
+        self.assertIn("e2e4", moves)
+        self.assertIn("e2e3", moves)
+        self.assertNotIn("e2d2", moves)
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/b7/8/2N5/3K4 w - - 0 1")
+        self.assertFalse([move for move in self.uci(board, board.legal_moves()) if move.startswith("c2")])
+
+    def test_check_evasions(self):
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/8/5n2/8/R3K3 w Q - 0 1")
+        self.assertEqual(self.uci(board, board.legal_moves()), ["e1d1", "e1e2", "e1f1", "e1f2"])
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/4r3/8/8/3QK3 w - - 0 1")  # block or step aside
+        self.assertEqual(self.uci(board, board.legal_moves()), ["d1e2", "e1d2", "e1f1", "e1f2"])
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/4r3/8/8/3QKN2 w - - 0 1")
+        self.assertNotIn("e1e2", self.uci(board, board.legal_moves()))  # the king does not hide behind itself
+
+    def test_en_passant_discovering_check(self):
+        board = chessEngine.Board.from_FEN("8/8/8/K2pP2r/8/8/8/7k w - d6 0 1")
+        self.assertNotIn("e5d6", self.uci(board, board.legal_moves()))
+        board = chessEngine.Board.from_FEN("8/8/8/K2pP3/8/8/8/7k w - d6 0 1")
+        self.assertIn("e5d6", self.uci(board, board.legal_captures()))
+
+    def test_legal_targets_and_move_piece(self):
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/4r3/8/4R3/4K3 w - - 0 1")
+        rook = board.mailbox[12]
+        moves, captures = board.legal_targets(rook.position)
+        self.assertEqual(sorted(position.square for position in moves), [20])
+        self.assertEqual([position.square for position in captures], [28])
+        self.assertEqual(board.legal_targets(board.mailbox[28].position), ([], []))  # not black's turn
+        self.assertFalse(board.move_piece(rook, chessEngine.Position(1, 0)))
+        self.assertTrue(board.move_piece(rook, chessEngine.Position(3, 4)))
+        self.assertEqual(board.get_FEN(), "4k3/8/8/8/4R3/8/8/4K3 b - - 0 1")
+
+
+class TestAttackMaps(unittest.TestCase):
+
+    def test_is_attacked(self):
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/8/2n5/8/R3K3 b - - 0 1")
+        self.assertTrue(board.is_attacked(56, chessEngine.WHITE))  # a8 along the file
+        self.assertFalse(board.is_attacked(60, chessEngine.WHITE))
+        self.assertTrue(board.is_attacked(3, chessEngine.BLACK))  # d1 by the knight
+        self.assertFalse(board.is_attacked(56, chessEngine.WHITE, board.occupancy() | 1 << 32))  # a5 blocks
+        self.assertEqual(board.attack_map(chessEngine.BLACK) >> 3 & 1, 1)
+
+    def test_tracked_maps_follow_moves(self):
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        board.track_attacks()
+        for uci in ("e1c1", "h3g2", "d5e6", "a6e2", "f3f7", "e8f7"):
+            board.make_move(board.move_from_uci(uci))
+            for side in (chessEngine.WHITE, chessEngine.BLACK):
+                self.assertEqual(board.attacked_by[side], board.compute_attack_map(side))
+                for square in range(64):
+                    self.assertEqual(board.is_attacked(square, side), board.is_attacked(square, side, board.occupancy()))
+        for _ in range(6):
+            board.unmake_move()
+        self.assertEqual(board.attacked_by, [board.compute_attack_map(side) for side in (0, 1)])
+        self.assertEqual(board.attack_stack, [])
+
+    def test_debug_detects_stale_map(self):
+        board = chessEngine.Board.from_FEN(START_FEN)
+        board.track_attacks()
+        board.debug = True
+        board.make_move(board.move_from_uci("e2e4"))
+        board.attacked_by[chessEngine.WHITE] = 0
+        with self.assertRaises(chessEngine.ZobristMismatch):
+            board.check_key()
+
+
+class TestZobrist(unittest.TestCase):
+
+    def test_incremental_key_matches_recomputation(self):
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        for move in board.all_moves():
+            board.make_move(move)
+            self.assertEqual(board.key, board.compute_key())
+            for reply in board.all_moves():
+                board.make_move(reply)
+                self.assertEqual(board.key, board.compute_key())
+                board.unmake_move()
+            board.unmake_move()
+
+    def test_transpositions_hash_equally(self):
+        first, second = chessEngine.Board(), chessEngine.Board()
+        for move in ("g1f3", "g8f6", "b1c3"):
+            first.make_move(first.move_from_uci(move))
+        for move in ("b1c3", "g8f6", "g1f3"):
+            second.make_move(second.move_from_uci(move))
+        self.assertEqual(first.key, second.key)
+        self.assertNotEqual(first.key, chessEngine.Board.from_FEN(first.get_FEN().replace(" b ", " w ")).key)
+
+    def test_castling_rights_and_en_passant_change_key(self):
+        board = chessEngine.Board.from_FEN("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        board.make_move(board.move_from_uci("h1h2"))
+        board.make_move(board.move_from_uci("h8h7"))
+        board.make_move(board.move_from_uci("h2h1"))
+        board.make_move(board.move_from_uci("h7h8"))
+        self.assertEqual(board.get_FEN().split()[2], "Qq")
+        self.assertNotEqual(board.key, chessEngine.Board.from_FEN("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1").key)
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/5p2/8/4P3/4K3 w - - 0 1")
+        board.make_move(board.move_from_uci("e2e4"))
+        self.assertEqual(board.get_FEN().split()[3], "e3")
+        self.assertEqual(board.key, chessEngine.Board.from_FEN(board.get_FEN()).key)
+
+    def test_evaluation_sums_follow_moves(self):
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        start = (board.middlegame, board.endgame, board.phase)
+        for move in board.all_moves():
+            board.make_move(move)
+            self.assertEqual((board.middlegame, board.endgame, board.phase), board.compute_evaluation())
+            board.unmake_move()
+        self.assertEqual((board.middlegame, board.endgame, board.phase), start)
+        self.assertEqual(chessEngine.Board().compute_evaluation(), (0, 0, chessEngine.MAX_PHASE))
+
+    def test_debug_detects_corrupted_key(self):
+        board = chessEngine.Board()
+        board.debug = True
+        board.make_move(board.move_from_uci("e2e4"))
+        board.key ^= 1
+        with self.assertRaises(chessEngine.ZobristMismatch):
+            board.make_move(board.move_from_uci("e7e5"))
+
+
+class TestMoveEncoding(unittest.TestCase):
+
+    def test_flags(self):
+        board = chessEngine.Board.from_FEN("r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1")
+        self.assertEqual(chessEngine.move_flag(board.move_from_uci("e1g1")), chessEngine.KING_CASTLE)
+        self.assertEqual(chessEngine.move_flag(board.move_from_uci("e5d6")), chessEngine.EP_CAPTURE)
+        self.assertEqual(chessEngine.move_flag(board.move_from_uci("a1a2")), chessEngine.QUIET_MOVE)
+        capture = board.move_from_uci("b7a8n")
+        self.assertTrue(chessEngine.is_capture(capture))
+        self.assertEqual(chessEngine.move_promotion(capture), chessEngine.KNIGHT)
+        self.assertIsNone(chessEngine.move_promotion(board.move_from_uci("a1a8")))
+
+    def test_conversions(self):
+        board = chessEngine.Board.from_FEN("r3k2r/1P6/8/3pP3/8/8/8/R3K2R w KQkq d6 0 1")
+        for move in board.all_moves():
+            self.assertLess(move, 1 << 16)
+            self.assertEqual(board.move_from_uci(chessEngine.move_to_uci(move)), move)
+            self.assertEqual(board.move_from_list(chessEngine.move_to_list(move)), move)
+        self.assertEqual(chessEngine.move_to_list(board.move_from_uci("b7b8r")), [[6, 1], [7, 1], chessEngine.ROOK])
+        self.assertEqual(chessEngine.move_to_list(board.move_from_uci("b7b8q")), [[6, 1], [7, 1]])
+
+
+class TestPositionAndPiece(unittest.TestCase):
+
+    def test_positions_are_interned(self):
+        self.assertIs(chessEngine.Position(3, 4), chessEngine.Position.at(28))
+        self.assertEqual({chessEngine.Position(3, 4), chessEngine.Position.at(28)}, {chessEngine.Position(3, 4)})
+
+    def test_position_is_immutable(self):
+        with self.assertRaises(AttributeError):
+            chessEngine.Position(0, 0).row = 1
+
+    def test_piece_codes(self):
+        piece = chessEngine.Piece(chessEngine.Color.BLACK, "rook", 5, chessEngine.Position(7, 0))
+        self.assertEqual((piece.side, piece.kind), (chessEngine.BLACK, chessEngine.ROOK))
+        piece.name = "queen"
+        self.assertEqual(piece.kind, chessEngine.QUEEN)
+        self.assertEqual(piece.color, chessEngine.Color.BLACK)
+
+    def test_piece_has_slots(self):
+        piece = chessEngine.Piece(chessEngine.Color.WHITE, "knight", 3, chessEngine.Position(0, 1))
+        self.assertFalse(hasattr(piece, "__dict__"))
+        board = chessEngine.Board()
+        self.assertIn(chessEngine.Position(2, 2), piece.correct_moves(board.get_piece_arr()))
+
+
+class TestTables(unittest.TestCase):
+
+    def test_knight_and_king_targets(self):
+        self.assertEqual(sorted(chessTables.KNIGHT_TARGETS[0]), [(1, 2), (2, 1)])
+        self.assertEqual(chessTables.KING_ATTACKS[63], 1 << 62 | 1 << 55 | 1 << 54)
+
+    def test_rays_match_ray_walking(self):
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        occupied = board.occupancy()
+        for square in range(64):
+            self.assertEqual(chessTables.queen_attacks(square, occupied), chessEngine.sliding_attacks(
+                square, occupied, chessEngine.ROOK_DIRECTIONS + chessEngine.BISHOP_DIRECTIONS))
+
+    def test_pawn_pushes(self):
+        self.assertEqual(chessTables.PAWN_PUSH_TARGETS[0][12], ((2, 4), (3, 4)))
+        self.assertEqual(chessTables.PAWN_PUSH_TARGETS[1][4], ())
+
+
+class TestMagic(unittest.TestCase):
+
+    def test_tables_match_ray_walking(self):
+        self.assertEqual(chessMagic.verify(), 0)
+
+    def test_cache_round_trip(self):
+        tables = chessMagic.build_tables()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "magic.bin")
+            chessMagic.save_tables(*tables, path=path)
+            self.assertEqual(chessMagic.load_tables(path), tables)
+            with open(path, "r+b") as f:
+                f.write(b"XXXX")
+            self.assertIsNone(chessMagic.load_tables(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
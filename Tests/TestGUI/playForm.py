@@ -191,10 +191,7 @@ class FormPlay(customtkinter.CTk):    # color class
     ###############################################################
     def SelectedField(self):
         if App.SelectedButtonField.selected == True:
-            position = chessEngine.Position
-            position.row = App.SelectedButtonField.row
-            position.col = App.SelectedButtonField.col
-            return position
+            return chessEngine.Position(App.SelectedButtonField.row, App.SelectedButtonField.col)
         return None
 
 playForm = FormPlay()
@@ -0,0 +1,416 @@
+import io
+import time
+import threading
+import contextlib
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import chessEngine
+import chessLogic
+import chessBench
+
+KIWIPETE_FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def evaluate(self, fen):
+        node = chessLogic.Node(fen, True)
+        node.board = chessEngine.Board.from_FEN(fen)
+        return node.get_static_evaluation()
+
+    def test_mirrored_positions_cancel(self):
+        self.assertEqual(self.evaluate("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"), 0)
+        self.assertEqual(self.evaluate("r3k3/1p6/8/8/8/8/1P6/R3K3 w - - 0 1"), 0)
+
+    def test_material_and_tables(self):
+        # pawn on e4 against a bare king: phase 0, so only the endgame table (+15) counts
+        self.assertEqual(self.evaluate("4k3/8/8/8/4P3/8/8/4K3 w - - 0 1"), 100 + 15)
+        self.assertEqual(self.evaluate("4k3/8/8/8/8/8/8/R3K3 w - - 0 1"), 500)
+
+    def test_tapered_between_phases(self):
+        self.assertEqual(chessEngine.taper(100, 20, chessEngine.MAX_PHASE), 100)
+        self.assertEqual(chessEngine.taper(100, 20, 0), 20)
+        self.assertEqual(chessEngine.taper(100, 20, 12), 60)
+        self.assertEqual(chessEngine.taper(-7, 0, 12), -chessEngine.taper(7, 0, 12))
+
+    def test_breakdown_adds_up(self):
+        fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+        node = chessLogic.Node(fen, True)
+        node.board = chessEngine.Board.from_FEN(fen)
+        breakdown = node.get_evaluation_breakdown()
+        self.assertEqual(breakdown["phase"], 24)
+        self.assertEqual(breakdown["material"][0], 0)
+        middlegame = sum(term[0] for name, term in breakdown.items() if name != "phase")
+        self.assertEqual(middlegame, node.board.middlegame)
+        self.assertEqual(node.get_static_evaluation(), middlegame)
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_store_and_probe(self):
+        table = chessLogic.TranspositionTable(size_mb=1)
+        move = chessEngine.pack_move(12, 28, chessEngine.DOUBLE_PAWN_PUSH)
+        table.store(0xDEADBEEF, 3, chessLogic.LOWER_BOUND, -250, move)
+        self.assertEqual(table.probe(0xDEADBEEF), (3, chessLogic.LOWER_BOUND, -250, move))
+        self.assertIsNone(table.probe(0xDEADBEEE))
+        self.assertEqual((table.probes, table.hits, table.hit_rate), (2, 1, 0.5))
+
+    def test_depth_preferred_slot_is_kept(self):
+        table = chessLogic.TranspositionTable(size_mb=1)
+        deep, shallow, other = 5, 5 + len(table), 5 + 2 * len(table)  # all in the same bucket
+        table.store(deep, 6, chessLogic.EXACT, 10)
+        table.store(shallow, 1, chessLogic.EXACT, 20)
+        table.store(other, 2, chessLogic.EXACT, 30)
+        self.assertEqual(table.probe(deep)[2], 10)
+        self.assertIsNone(table.probe(shallow))
+        self.assertEqual(table.probe(other)[2], 30)
+        table.new_search()
+        table.store(shallow, 1, chessLogic.EXACT, 20)
+        self.assertIsNone(table.probe(deep))
+
+    def test_memory_is_preallocated(self):
+        table = chessLogic.TranspositionTable(size_mb=1)
+        size = len(table.entries)
+        for key in range(1, 3 * size):
+            table.store(key * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF, key % 7, chessLogic.EXACT, key)
+        self.assertEqual(len(table.entries), size)
+        self.assertGreater(table.stats()["overwrites"], 0)
+
+    def test_mate_scores_are_stored_relative_to_the_position(self):
+        table = chessLogic.TranspositionTable(size_mb=1)
+        table.store(0xDEADBEEF, 2, chessLogic.EXACT, chessLogic.MATE_SCORE - 7, ply=4)  # mate 3 plies below
+        self.assertEqual(table.probe(0xDEADBEEF, ply=2)[2], chessLogic.MATE_SCORE - 5)
+        table.store(0xDEADBEEF, 2, chessLogic.EXACT, -(chessLogic.MATE_SCORE - 6), ply=6)  # mated here
+        self.assertEqual(table.probe(0xDEADBEEF, ply=1)[2], -(chessLogic.MATE_SCORE - 1))
+        table.store(0xDEADBEEF, 2, chessLogic.EXACT, 250, ply=6)
+        self.assertEqual(table.probe(0xDEADBEEF, ply=1)[2], 250)
+
+    def test_size(self):
+        for size_mb in (1, 16):
+            table = chessLogic.TranspositionTable(size_mb=size_mb)
+            self.assertEqual(table.keys.itemsize * len(table.keys) + table.entries.itemsize * len(table.entries),
+                             size_mb * 1024 * 1024)
+        table = chessLogic.TranspositionTable(size_mb=1, shared=True)
+        try:
+            self.assertEqual(table._view.nbytes, 1024 * 1024)
+        finally:
+            table.unlink()
+
+    def test_shared_table(self):
+        table = chessLogic.TranspositionTable(size_mb=1, shared=True)
+        other = chessLogic.TranspositionTable(size_mb=1, shared=table.name)  # as another process attaches
+        try:
+            table.store(0xDEADBEEF, 3, chessLogic.EXACT, 42)
+            self.assertEqual(other.probe(0xDEADBEEF), (3, chessLogic.EXACT, 42, 0))
+            index = (0xDEADBEEF & other.mask) << 1
+            other.entries[index] ^= 1 << 40  # half written by a second process
+            self.assertIsNone(table.probe(0xDEADBEEF))
+            other.clear()
+            self.assertFalse(any(table.entries))
+        finally:
+            other.close()
+            table.unlink()
+
+    def test_search_value_unchanged_by_table(self):
+        values = []
+        for table in (chessLogic.TranspositionTable(), chessLogic.TranspositionTable(size_mb=0)):
+            context = chessLogic.SearchContext(t_table=table)  # the second table has a single bucket
+            with contextlib.redirect_stdout(io.StringIO()):
+                values.append(chessLogic.GameTree(KIWIPETE_FEN, True, context=context).alpha_beta_evaluation(2))
+        self.assertEqual(values[0], values[1])
+
+
+
+class TestSearch(unittest.TestCase):
+
+    def search(self, fen, depth):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return chessLogic.GameTree(fen, fen.split()[1] == "w").alpha_beta_evaluation(depth)
+
+    def test_mate_and_stalemate(self):
+        self.assertGreaterEqual(self.search("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1", 2), chessLogic.MATE_BOUND)
+        self.assertLessEqual(self.search("6k1/5ppp/8/8/8/8/5PPP/r5K1 w - - 0 1", 2), -chessLogic.MATE_BOUND)
+        self.assertEqual(self.search("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", 2), 0)
+
+
+class TestSearchContext(unittest.TestCase):
+
+    def test_beta_cutoff_updates_killers_and_history(self):
+        context = chessLogic.SearchContext()
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        quiet, other, capture = (board.move_from_uci(uci) for uci in ("a2a3", "b2b3", "e2a6"))
+        context.beta_cutoff(3, chessEngine.WHITE, quiet, 4, 1, chessEngine.NULL_MOVE, [other])
+        context.beta_cutoff(3, chessEngine.WHITE, capture, 4, 0, chessEngine.NULL_MOVE, [])
+        self.assertEqual(context.killers[3], [quiet, chessEngine.NULL_MOVE])
+        self.assertEqual(context.history[chessEngine.WHITE][quiet & 4095], 16)
+        self.assertEqual(context.history[chessEngine.WHITE][other & 4095], -16)
+        self.assertEqual(context.history[chessEngine.BLACK][quiet & 4095], 0)
+        stats = context.stats()
+        self.assertEqual((stats["cutoffs"], stats["first_move_cutoffs"], stats["capture_cutoffs"],
+                          stats["quiet_cutoffs"]), (2, 1, 1, 1))
+        context.new_search()
+        self.assertEqual((context.killers[3][0], context.history[chessEngine.WHITE][quiet & 4095]),
+                         (chessEngine.NULL_MOVE, 4))
+
+    def test_search_reports_stats(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            tree = chessLogic.GameTree(KIWIPETE_FEN, True)
+            tree.alpha_beta_evaluation(2)
+        stats = tree.search_stats()
+        self.assertGreater(stats["nodes"], 0)
+        self.assertGreater(stats["cutoffs"], 0)
+        self.assertGreater(stats["first_move_rate"], 0.5)
+        self.assertIn("hit_rate", stats["tt"])
+
+    def test_contexts_are_independent(self):
+        first, second = chessLogic.SearchContext(), chessLogic.SearchContext()
+        with contextlib.redirect_stdout(io.StringIO()):
+            value = chessLogic.GameTree(KIWIPETE_FEN, True, context=first).alpha_beta_evaluation(2)
+        self.assertGreater(first.nodes, 0)
+        self.assertEqual((second.nodes, second.t_table.stores, second.killers[1][0]), (0, 0, chessEngine.NULL_MOVE))
+        first.clear()
+        self.assertEqual((first.nodes, first.t_table.probe(chessEngine.Board.from_FEN(KIWIPETE_FEN).key)), (0, None))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(chessLogic.GameTree(KIWIPETE_FEN, True, context=first).alpha_beta_evaluation(2), value)
+
+    def test_concurrent_searches(self):
+        fens = [fen for _, fen in chessBench.BENCH_POSITIONS[:4]]
+        expected = []
+        for fen in fens:
+            expected.append(chessLogic.GameTree(fen, fen.split()[1] == "w", retain_tree=False).iterative_deepening(
+                max_depth=3))
+        trees = [chessLogic.GameTree(fen, fen.split()[1] == "w", retain_tree=False) for fen in fens]
+        with ThreadPoolExecutor(len(trees)) as executor:
+            results = list(executor.map(lambda tree: tree.iterative_deepening(max_depth=3), trees))
+        self.assertEqual(results, expected)
+
+    def test_stop(self):
+        tree = chessLogic.GameTree(KIWIPETE_FEN, True, retain_tree=False)
+        stopper = threading.Timer(0.2, tree.context.stop)
+        stopper.start()
+        start = time.perf_counter()
+        move, _, _ = tree.iterative_deepening()
+        stopper.join()
+        self.assertLess(time.perf_counter() - start, 2.0)
+        self.assertIn(move, chessEngine.Board.from_FEN(KIWIPETE_FEN).legal_moves())
+
+
+class TestQuiescence(unittest.TestCase):
+
+    def quiescence(self, fen):
+        board = chessEngine.Board.from_FEN(fen)
+        context = chessLogic.SearchContext()
+        stand_pat = chessLogic.evaluate(board) * (1 if board.side == chessEngine.WHITE else -1)
+        value = context.quiescence(board, 0, -10 ** 9, 10 ** 9, stand_pat)
+        self.assertEqual(board.get_FEN(), chessEngine.Board.from_FEN(fen).get_FEN())
+        return value, stand_pat, context
+
+    def test_quiet_position_stands_pat(self):
+        value, stand_pat, context = self.quiescence("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+        self.assertEqual((value, context.nodes), (stand_pat, 1))
+
+    def test_captures_and_promotions(self):
+        value, stand_pat, _ = self.quiescence("4k3/8/8/3q4/4P3/8/8/4K3 w - - 0 1")
+        self.assertGreater(value, stand_pat + 800)
+        value, stand_pat, _ = self.quiescence("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertGreater(value, stand_pat + 600)  # the pawn on the seventh is already worth a lot
+
+    def test_losing_capture_is_skipped(self):
+        value, stand_pat, context = self.quiescence("4k3/2p5/3p4/8/8/8/3Q4/4K3 w - - 0 1")
+        self.assertEqual((value, context.see_prunes), (stand_pat, 1))
+
+    def test_depth_and_ply_floor(self):
+        fen = "4k3/8/8/8/8/8/4q3/4K3 w - - 0 1"  # in check, the king takes the queen
+        board = chessEngine.Board.from_FEN(fen)
+        stand_pat = chessLogic.evaluate(board)
+        self.assertGreater(self.quiescence(fen)[0], stand_pat)
+        for depth, ply in ((-chessLogic.QUIESCENCE_MAX_DEPTH, 0), (0, chessLogic.MAX_PLY - 1)):
+            context = chessLogic.SearchContext()
+            self.assertEqual(context.quiescence(board, depth, -10 ** 9, 10 ** 9, stand_pat, ply), stand_pat)
+            self.assertEqual(context.nodes, 1)
+
+    def test_mate_when_in_check(self):
+        value, _, _ = self.quiescence("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1")
+        self.assertEqual(value, -chessLogic.MATE_SCORE)
+
+
+class TestSelectiveSearch(unittest.TestCase):
+
+    def test_every_feature_saves_nodes(self):
+        positions = chessBench.BENCH_POSITIONS[1:2]
+        all_off = chessBench.bench(chessLogic.SearchOptions.none(), 3, positions)[0][1]
+        _, all_on, _, _, stats = chessBench.bench(chessLogic.SearchOptions(), 3, positions)[0]
+        self.assertLess(all_on, all_off)
+        for name in ("reductions", "razor_cutoffs"):
+            self.assertGreater(stats[name], 0, name)
+        # razoring takes most frontier nodes
+        stats = chessBench.bench(chessLogic.SearchOptions(razoring=False), 3, positions)[0][4]
+        self.assertGreater(stats["futility_prunes"], 0)
+
+    def test_mate_is_still_found(self):
+        tree = chessLogic.GameTree("k7/8/2K5/8/8/8/8/7R w - - 0 1", True)
+        move, evaluation, _ = tree.iterative_deepening(max_depth=5)
+        self.assertIn(chessEngine.move_to_uci(move), ("c6b6", "c6c7"))  # mate in two
+        self.assertEqual(evaluation, chessLogic.MATE_SCORE - 3)
+        self.assertGreater(tree.search_stats()["mate_distance_cutoffs"], 0)
+
+    def test_mate_score_counts_plies_from_the_root(self):
+        fen = "k7/8/2K5/8/8/8/8/7R w - - 0 1"
+        for options in (chessLogic.SearchOptions(), chessLogic.SearchOptions(**{name: False for name in chessBench.FEATURES})):
+            tree = chessLogic.GameTree(fen, True, retain_tree=False, context=chessLogic.SearchContext(options))
+            self.assertEqual(tree.iterative_deepening(max_depth=5)[1], chessLogic.MATE_SCORE - 3)
+
+    def test_compare_features(self):
+        totals = chessBench.compare_features(1, ("null_move",), chessBench.BENCH_POSITIONS[:1], io.StringIO())
+        self.assertEqual(list(totals), ["all on", "no null_move", "all off"])
+
+
+class TestIterativeDeepening(unittest.TestCase):
+
+    def deepen(self, fen, **limits):
+        self.tree = chessLogic.GameTree(fen, fen.split()[1] == "w")
+        return self.tree.iterative_deepening(**limits)
+
+    def test_time_budget(self):
+        self.assertEqual(chessLogic.time_budget(move_time=1.5, time_left=60), 1.5)
+        self.assertIsNone(chessLogic.time_budget())
+        self.assertAlmostEqual(chessLogic.time_budget(time_left=60, increment=2), 3.5)
+        self.assertAlmostEqual(chessLogic.time_budget(time_left=0.5, increment=10), 0.45)
+
+    def test_same_result_as_fixed_depth(self):
+        move, evaluation, depth = self.deepen(KIWIPETE_FEN, max_depth=2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tree = chessLogic.GameTree(KIWIPETE_FEN, True)
+            self.assertEqual(evaluation, tree.alpha_beta_evaluation(2))
+        self.assertEqual((move, depth), (tree.suggest_move()[0], 2))
+
+    def test_node_limit(self):
+        move, _, depth = self.deepen(KIWIPETE_FEN, max_nodes=1000)
+        self.assertLess(self.tree.context.nodes, 1000 + chessLogic.SearchLimits.CHECK_MASK + 1)
+        self.assertIn(move, chessEngine.Board.from_FEN(KIWIPETE_FEN).legal_moves())
+        self.assertIsNone(self.tree.context.limits)
+
+    def test_time_limit(self):
+        start = time.perf_counter()
+        move, _, depth = self.deepen(KIWIPETE_FEN, move_time=0.3)
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIn(move, chessEngine.Board.from_FEN(KIWIPETE_FEN).legal_moves())
+        move, _, depth = self.deepen(KIWIPETE_FEN, move_time=0)  # no time at all still gives a move
+        self.assertIn(move, chessEngine.Board.from_FEN(KIWIPETE_FEN).legal_moves())
+        self.assertLessEqual(depth, 1)
+
+    def test_principal_variation(self):
+        move, evaluation, depth = self.deepen(KIWIPETE_FEN, max_depth=3)
+        tree_pv = self.tree.context.pv[0]
+        self.assertEqual(len(tree_pv), 3)
+        self.assertEqual(tree_pv[0], move)
+        board = chessEngine.Board.from_FEN(KIWIPETE_FEN)
+        for pv_move in tree_pv:  # every move of the line is legal in turn
+            self.assertIn(pv_move, board.legal_moves())
+            board.make_move(pv_move)
+
+    def test_pvs_and_aspiration_keep_the_value(self):
+        fen = chessBench.BENCH_POSITIONS[3][1]
+        _, evaluation, _ = self.deepen(fen, max_depth=3)
+        self.assertGreater(self.tree.context.aspiration_researches, 0)  # 2 plies miss a lost piece
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(evaluation, chessLogic.GameTree(fen, True).alpha_beta_evaluation(3))
+
+    def test_on_info_after_every_iteration(self):
+        infos = []
+        move, evaluation, _ = self.deepen(KIWIPETE_FEN, max_depth=3, on_info=infos.append)
+        self.assertEqual([info["depth"] for info in infos], [1, 2, 3])
+        self.assertEqual((infos[-1]["score"], infos[-1]["pv"]), (evaluation, self.tree.pv))
+        self.assertEqual(infos[-1]["nodes"], self.tree.search_stats()["nodes"])
+        self.assertLess(infos[0]["nodes"], infos[-1]["nodes"])
+        self.assertGreater(infos[-1]["nps"], 0)
+
+    def test_stop_token(self):
+        stop, infos = threading.Event(), []
+        stopper = threading.Timer(0.3, stop.set)
+        start = time.perf_counter()
+        stopper.start()
+        move, evaluation, depth = self.deepen(KIWIPETE_FEN, stop=stop, on_info=infos.append)
+        stopper.join()
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual((move, evaluation, depth), (infos[-1]["pv"][0], infos[-1]["score"], infos[-1]["depth"]))
+        stop.set()  # already set before the search: only the fallback move
+        move, _, depth = self.deepen(KIWIPETE_FEN, stop=stop)
+        self.assertEqual(depth, 0)
+        self.assertIn(move, chessEngine.Board.from_FEN(KIWIPETE_FEN).legal_moves())
+
+    def test_stops_at_mate(self):
+        move, evaluation, depth = self.deepen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1", max_depth=6)
+        self.assertEqual((chessEngine.move_to_uci(move), depth), ("a1a8", 1))  # quiescence finds no evasion
+        self.assertEqual(evaluation, chessLogic.MATE_SCORE - 1)
+
+    def test_no_legal_move(self):
+        for fen in ("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1", "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"):
+            for retain_tree in (True, False):
+                tree = chessLogic.GameTree(fen, False, retain_tree=retain_tree)
+                move, _, _ = tree.iterative_deepening(max_depth=3)
+                self.assertEqual(move, chessEngine.NULL_MOVE)
+
+
+class TestLazySMP(unittest.TestCase):
+
+    def test_workers_agree_on_a_legal_move(self):
+        tree = chessLogic.GameTree(KIWIPETE_FEN, True, retain_tree=False)
+        move, evaluation, depth = tree.lazy_smp(workers=2, max_depth=2)
+        self.assertEqual(depth, 2)
+        self.assertEqual([result[0] for result in tree.worker_results], [0, 1])
+        self.assertIn(move, chessEngine.Board.from_FEN(KIWIPETE_FEN).legal_moves())
+        self.assertEqual(tree.pv[0], move)
+
+    def test_time_limit(self):
+        start = time.perf_counter()
+        tree = chessLogic.GameTree(KIWIPETE_FEN, True, retain_tree=False)
+        move, _, _ = tree.lazy_smp(workers=2, move_time=0.5)
+        self.assertLess(time.perf_counter() - start, 3.0)
+        self.assertIn(move, chessEngine.Board.from_FEN(KIWIPETE_FEN).legal_moves())
+
+    def test_stop_and_on_info(self):
+        stop, infos = threading.Event(), []
+        tree = chessLogic.GameTree(KIWIPETE_FEN, True, retain_tree=False)
+        stopper = threading.Timer(1.0, stop.set)
+        stopper.start()
+        move, evaluation, depth = tree.lazy_smp(workers=2, stop=stop, on_info=infos.append)
+        stopper.join()
+        self.assertEqual(len(tree.worker_results), 2)
+        depths = [info["depth"] for info in infos]
+        self.assertEqual(depths, sorted(set(depths)))
+        self.assertEqual(depth, depths[-1])
+        self.assertIn(move, chessEngine.Board.from_FEN(KIWIPETE_FEN).legal_moves())
+
+
+class TestTreelessSearch(unittest.TestCase):
+
+    def search(self, retain_tree, depth=3):
+        tree = chessLogic.GameTree(KIWIPETE_FEN, True, retain_tree=retain_tree)
+        result = tree.iterative_deepening(max_depth=depth)
+        return tree, result, tree.context.nodes
+
+    def test_pv_table(self):
+        pv = chessLogic.PVTable(size=4)
+        pv.clear_ply(3)  # every node clears its row on entry
+        pv.update(2, 7)
+        pv.update(1, 6)
+        pv.clear_ply(0)
+        self.assertEqual((pv.line(1), pv[0]), ([6, 7], []))
+        pv.update(0, 5)
+        self.assertEqual(pv.line(), [5, 6, 7])
+        pv.clear_ply(1)
+        pv.update(0, 9)  # a new best move drops the old continuation
+        self.assertEqual(pv.line(), [9])
+
+    def test_same_search_without_the_tree(self):
+        tree, result, nodes = self.search(True)
+        flat_tree, flat_result, flat_nodes = self.search(False)
+        self.assertEqual((flat_result, flat_nodes, flat_tree.pv), (result, nodes, tree.pv))
+        self.assertTrue(tree.root.children)
+        self.assertEqual(flat_tree.root.children, [])
+        self.assertEqual(flat_tree.suggest_move()[0], result[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import chessEngine
+import chessPerft
+
+
+class TestPerft(unittest.TestCase):
+
+    def test_reference_positions(self):
+        for name, fen, counts in chessPerft.REFERENCE_POSITIONS:
+            board = chessEngine.Board.from_FEN(fen)
+            for depth in (1, 2):
+                with self.subTest(position=name, depth=depth):
+                    self.assertEqual(chessPerft.perft(board, depth), counts[depth - 1])
+            self.assertEqual(board.get_FEN(), chessEngine.Board.from_FEN(fen).get_FEN())
+
+    def test_depth_three(self):
+        for name, fen, counts in chessPerft.REFERENCE_POSITIONS[2:4]:
+            with self.subTest(position=name):
+                self.assertEqual(chessPerft.perft(chessEngine.Board.from_FEN(fen), 3), counts[2])
+                self.assertEqual(chessPerft.perft(chessEngine.Board.from_FEN(fen), 3, legal=False), counts[2])
+
+    def test_divide(self):
+        board = chessEngine.Board.from_FEN(chessPerft.REFERENCE_POSITIONS[4][1])
+        counts = dict(chessPerft.divide(board, 2))
+        self.assertEqual(sum(counts.values()), 1486)
+        self.assertIn("d7c8n", counts)
+
+
+class TestSpecialMoves(unittest.TestCase):
+
+    def test_en_passant_is_undone(self):
+        board = chessEngine.Board.from_FEN("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        fen, key = board.get_FEN(), board.key
+        move = board.move_from_uci("e5d6")
+        self.assertIn(move, board.all_moves())
+        board.make_move(move)
+        self.assertEqual(board.get_FEN().split()[0], "4k3/8/3P4/8/8/8/8/4K3")
+        board.unmake_move()
+        self.assertEqual((board.get_FEN(), board.key), (fen, key))
+
+    def test_no_castling_through_check(self):
+        board = chessEngine.Board.from_FEN("4k3/8/8/8/8/8/5r2/R3K2R w KQ - 0 1")
+        self.assertEqual(board.castling_targets(chessEngine.WHITE, board.occupancy()), 1 << 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -73,4 +73,25 @@ KINGS_TABLE = [
     [-10,-20,-20,-20,-20,-20,-20,-10],
     [20, 20,  0,  0,  0,  0, 20, 20],
     [20, 30, 10,  0,  0, 10, 30, 20]
-]
\ No newline at end of file
+]
+PAWN_ENDGAME_TABLE = [
+    [0,  0,  0,  0,  0,  0,  0,  0],
+    [80, 80, 80, 80, 80, 80, 80, 80],
+    [50, 50, 50, 50, 50, 50, 50, 50],
+    [30, 30, 30, 30, 30, 30, 30, 30],
+    [15, 15, 15, 15, 15, 15, 15, 15],
+    [5,  5,  5,  5,  5,  5,  5,  5],
+    [0,  0,  0,  0,  0,  0,  0,  0],
+    [0,  0,  0,  0,  0,  0,  0,  0]
+]
+
+# the pieces keep their squares whatever the phase
+KNIGHTS_ENDGAME_TABLE = KNIGHTS_TABLE
+BISHOPS_ENDGAME_TABLE = BISHOPS_TABLE
+ROOKS_ENDGAME_TABLE = ROOKS_TABLE
+QUEENS_ENDGAME_TABLE = QUEENS_TABLE
+
+# pawn, knight, bishop, rook, queen, king
+MIDDLEGAME_TABLES = (PAWN_TABLE, KNIGHTS_TABLE, BISHOPS_TABLE, ROOKS_TABLE, QUEENS_TABLE, KINGS_TABLE)
+ENDGAME_TABLES = (PAWN_ENDGAME_TABLE, KNIGHTS_ENDGAME_TABLE, BISHOPS_ENDGAME_TABLE, ROOKS_ENDGAME_TABLE,
+                  QUEENS_ENDGAME_TABLE, KINGS_ENDGAME_TABLE)
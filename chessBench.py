@@ -0,0 +1,69 @@
+#########################################################
+#                                                       #
+#    Search benchmark: nodes and time of a fixed        #
+#    depth search over a set of positions, with each    #
+#    selective search feature switched off in turn      #
+#                                                       #
+#    python chessBench.py --depth 4                     #
+#    python chessBench.py --depth 3 --only null_move    #
+#                                                       #
+#########################################################
+
+import sys
+import time
+import argparse
+
+import chessLogic
+import chessPerft
+
+BENCH_POSITIONS = tuple((name, fen) for name, fen, _ in chessPerft.REFERENCE_POSITIONS)
+FEATURES = tuple(vars(chessLogic.SearchOptions()))
+
+
+def bench(options, depth, positions=BENCH_POSITIONS):
+    """Searches every position to `depth` with `options`, each in a new SearchContext
+
+    Returns:
+        list: (name, nodes, seconds, evaluation, search statistics) per position
+    """
+    results = []
+    for name, fen in positions:
+        tree = chessLogic.GameTree(fen, fen.split()[1] == "w", retain_tree=False,
+                                   context=chessLogic.SearchContext(options))
+        start = time.perf_counter()
+        _, evaluation, _ = tree.iterative_deepening(max_depth=depth)
+        stats = tree.search_stats()
+        results.append((name, stats["nodes"], time.perf_counter() - start, evaluation, stats))
+    return results
+
+
+def compare_features(depth, features=FEATURES, positions=BENCH_POSITIONS, out=sys.stdout):
+    """Prints the totals with every feature on, each of `features` off and all of them off
+
+    Returns:
+        dict: configuration name -> (nodes, seconds)
+    """
+    configurations = [("all on", chessLogic.SearchOptions())]
+    for feature in features:
+        configurations.append((f"no {feature}", chessLogic.SearchOptions(**{feature: False})))
+    configurations.append(("all off", chessLogic.SearchOptions.none()))
+    totals = {}
+    for name, options in configurations:
+        results = bench(options, depth, positions)
+        nodes = sum(result[1] for result in results)
+        seconds = sum(result[2] for result in results)
+        totals[name] = nodes, seconds
+        print(f"{name:<26} {nodes:>10} nodes {seconds:8.2f}s", file=out)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search node count and time benchmark")
+    parser.add_argument("--depth", type=int, default=3, help="iterative deepening depth")
+    parser.add_argument("--only", choices=FEATURES, nargs="+", help="features to switch off one by one")
+    args = parser.parse_args()
+    compare_features(args.depth, args.only or FEATURES)
+
+
+if __name__ == "__main__":
+    main()
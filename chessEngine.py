@@ -10,56 +10,285 @@
 
 from enum import Enum
 import copy
+import random
+from array import array
 
-class WhiteCheck(Exception):
-    def __init__(self, message):
-        self.message = message
-    
-    def __str__(self):
-        if self.message:
-            return "WhiteCheck: " + self.message
-        else:
-            return "WhiteCheck"
-    
-class BlackCheck(Exception):
-    def __init__(self, message):
-        self.message = message
-    
-    def __str__(self):
-        if self.message:
-            return "BlackCheck: " + self.message
-        else:
-            return "BlackCheck"
+import bpt
+import chessTables
+import chessMagic
 
-class WhiteMate(Exception):
+class ZobristMismatch(Exception):
     def __init__(self, message):
         self.message = message
-    def __str__(self):
-        if self.message:
-            return "WhiteMate: " + self.message
-        else:
-            return "WhiteMate"
 
-class BlackMate(Exception):
-    def __init__(self, message):
-        self.message = message
     def __str__(self):
         if self.message:
-            return "BlackMate: " + self.message
+            return "ZobristMismatch: " + self.message
         else:
-            return "BlackMate"
-        
+            return "ZobristMismatch"
+
 class Color(Enum):
     WHITE = 1
     BLACK = 2
 
 
+###############################################
+#                                             #
+#    Bitboards: one 64-bit integer per set    #
+#    of pieces, bit (row * 8 + col)           #
+#                                             #
+###############################################
+
+# Integer codes used by the engine and the search. Color members and piece
+# names are kept for the GUI, FEN and printing only.
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+COLORS = (Color.WHITE, Color.BLACK)
+COLOR_INDEX = {Color.WHITE: WHITE, Color.BLACK: BLACK}
+PIECE_NAMES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+PIECE_CODES = {name: kind for kind, name in enumerate(PIECE_NAMES)}
+PIECE_VALUES = (1, 3, 3, 5, 9, 0)  # in pawns
+FEN_LETTERS = "pnbrqk"
+
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+RANK_1 = 0xFF
+RANK_2 = RANK_1 << 8
+RANK_7 = RANK_1 << 48
+RANK_8 = RANK_1 << 56
+
+# (shift, mask applied after the shift to cut off board wrap-around)
+ROOK_DIRECTIONS = ((8, FULL), (-8, FULL), (1, NOT_FILE_A), (-1, NOT_FILE_H))
+BISHOP_DIRECTIONS = ((9, NOT_FILE_A), (7, NOT_FILE_H), (-7, NOT_FILE_A), (-9, NOT_FILE_H))
+
+
+def iter_bits(bb):
+    """Yields the indices of the set bits of a bitboard, lowest first"""
+    while bb:
+        lsb = bb & -bb
+        yield lsb.bit_length() - 1
+        bb ^= lsb
+
+
+def shift(bb, step):
+    """Shifts a bitboard by `step` squares (positive is towards h8)"""
+    if step > 0:
+        return (bb << step) & FULL
+    return bb >> -step
+
+
+def sliding_attacks(square, occupied, directions):
+    """Walks the rays of a slider on `square`, stopping at the first blocker of each ray"""
+    attacks = 0
+    for step, mask in directions:
+        bb = 1 << square
+        while True:
+            bb = shift(bb, step) & mask
+            if not bb:
+                break
+            attacks |= bb
+            if bb & occupied:
+                break
+    return attacks
+
+
+def _knight_targets(square, occupied):
+    return chessTables.KNIGHT_ATTACKS[square]
+
+
+def _king_targets(square, occupied):
+    return chessTables.KING_ATTACKS[square]
+
+
+# attack set of a non-pawn piece on a square for a given occupancy, indexed by kind
+PIECE_ATTACKS = (None, _knight_targets, chessMagic.bishop_attacks, chessMagic.rook_attacks,
+                 chessMagic.queen_attacks, _king_targets)
+PAWN_START_RANKS = (RANK_2, RANK_7)
+PROMOTION_RANKS = (RANK_8, RANK_1)
+# king target square of a castling move -> (rook from, rook to)
+CASTLING_ROOK_SQUARES = {2: (0, 3), 6: (7, 5), 58: (56, 59), 62: (63, 61)}
+
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING = 15
+CASTLING_FEN = ((WHITE_KINGSIDE, "K"), (WHITE_QUEENSIDE, "Q"), (BLACK_KINGSIDE, "k"), (BLACK_QUEENSIDE, "q"))
+# castling right -> (side, king square, rook square)
+CASTLING_PIECES = {WHITE_KINGSIDE: (WHITE, 4, 7), WHITE_QUEENSIDE: (WHITE, 4, 0),
+                   BLACK_KINGSIDE: (BLACK, 60, 63), BLACK_QUEENSIDE: (BLACK, 60, 56)}
+# rights lost when a piece leaves or is captured on a square
+CASTLING_RIGHTS_OF = [0] * 64
+for _right, (_, _king_square, _rook_square) in CASTLING_PIECES.items():
+    CASTLING_RIGHTS_OF[_king_square] |= _right
+    CASTLING_RIGHTS_OF[_rook_square] |= _right
+CASTLING_MASKS = tuple(ALL_CASTLING ^ rights for rights in CASTLING_RIGHTS_OF)
+CASTLING_SIDES = (WHITE_KINGSIDE | WHITE_QUEENSIDE, BLACK_KINGSIDE | BLACK_QUEENSIDE)
+
+
+###############################################
+#                                             #
+#    Zobrist keys: a position hashes to the   #
+#    XOR of the keys of everything in it      #
+#                                             #
+###############################################
+
+_zobrist_random = random.Random(0x5EED)
+ZOBRIST_PIECES = tuple(tuple(tuple(_zobrist_random.getrandbits(64) for _ in range(64)) for _ in range(6))
+                       for _ in range(2))
+ZOBRIST_SIDE = _zobrist_random.getrandbits(64)
+ZOBRIST_CASTLING = tuple(_zobrist_random.getrandbits(64) for _ in range(16))
+ZOBRIST_EP = tuple(_zobrist_random.getrandbits(64) for _ in range(8))
+
+
+# Board.game_status results, the side to move is the one mated or stalemated
+ONGOING, CHECK, CHECKMATE, STALEMATE, KING_CAPTURED, FIFTY_MOVE_DRAW, INSUFFICIENT_MATERIAL = range(7)
+STATUS_NAMES = ("ongoing", "check", "checkmate", "stalemate", "king captured", "fifty move draw",
+                "insufficient material")
+LIGHT_SQUARES = 0x55AA55AA55AA55AA
+
+
+###############################################
+#                                             #
+#    Evaluation tables: material plus         #
+#    piece-square value of every piece on     #
+#    every square, + for white, - for black   #
+#                                             #
+###############################################
+
+MATERIAL = (100, 330, 320, 500, 900, 20000)  # centipawns
+# game phase: 24 with all pieces on the board, 0 with pawns and kings only
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 0)
+MAX_PHASE = 24
+
+
+def _flatten(table, side):
+    """bpt tables are drawn from white's side, rank 8 first. Black reads them turned around"""
+    if side == WHITE:
+        return [table[7 - (square >> 3)][square & 7] for square in range(64)]
+    return [table[square >> 3][7 - (square & 7)] for square in range(64)]
+
+
+def _evaluation_table(tables, material=True):
+    return tuple(tuple(tuple((MATERIAL[kind] * material + value) * (1 if side == WHITE else -1)
+                             for value in _flatten(tables[kind], side))
+                       for kind in range(6))
+                 for side in (WHITE, BLACK))
+
+
+# EVAL_MIDDLEGAME[side][kind][square]
+EVAL_MIDDLEGAME = _evaluation_table(bpt.MIDDLEGAME_TABLES)
+EVAL_ENDGAME = _evaluation_table(bpt.ENDGAME_TABLES)
+# the same without material, for the evaluation breakdown
+PST_MIDDLEGAME = _evaluation_table(bpt.MIDDLEGAME_TABLES, False)
+PST_ENDGAME = _evaluation_table(bpt.ENDGAME_TABLES, False)
+
+
+def taper(middlegame, endgame, phase):
+    """Blends a middlegame and an endgame score by game phase, rounding towards zero so colours stay symmetric"""
+    phase = min(phase, MAX_PHASE)  # promotions can push it past the start position
+    total = middlegame * phase + endgame * (MAX_PHASE - phase)
+    return total // MAX_PHASE if total >= 0 else -(-total // MAX_PHASE)
+
+
+###############################################
+#                                             #
+#    Moves are packed into 16 bit integers:   #
+#    from | to << 6 | flag << 12              #
+#                                             #
+###############################################
+
+QUIET_MOVE, DOUBLE_PAWN_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EP_CAPTURE = 0, 1, 2, 3, 4, 5
+PROMOTION = 8  # | CAPTURE for a capturing promotion, | kind - KNIGHT for the new piece
+NULL_MOVE = 0  # a1a1, never a real move
+# promotion flags in the order they are generated, queen first
+PROMOTION_FLAGS = tuple(PROMOTION | kind - KNIGHT for kind in (QUEEN, KNIGHT, ROOK, BISHOP))
+
+
+def pack_move(from_square, to_square, flag=QUIET_MOVE):
+    return from_square | to_square << 6 | flag << 12
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return move >> 6 & 63
+
+
+def move_flag(move):
+    return move >> 12
+
+
+def is_capture(move):
+    return bool(move >> 14 & 1)
+
+
+def move_promotion(move):
+    """Returns the kind a move promotes to, or None"""
+    if move >> 15:
+        return (move >> 12 & 3) + KNIGHT
+    return None
+
+
+def square_name(square):
+    return "abcdefgh"[square & 7] + str((square >> 3) + 1)
+
+
+def move_to_uci(move):
+    """Returns the UCI string of a move, e.g. e2e4 or e7e8q"""
+    uci = square_name(move & 63) + square_name(move >> 6 & 63)
+    if move >> 15:
+        uci += FEN_LETTERS[(move >> 12 & 3) + KNIGHT]
+    return uci
+
+
+def move_to_list(move):
+    """Returns the old list form [[from_row, from_col], [to_row, to_col]] of a move
+
+    Underpromotions add the kind they promote to as a third element.
+    """
+    from_square, to_square = move & 63, move >> 6 & 63
+    result = [[from_square >> 3, from_square & 7], [to_square >> 3, to_square & 7]]
+    promotion = move_promotion(move)
+    if promotion is not None and promotion != QUEEN:
+        result.append(promotion)
+    return result
+
+
 class Position:
-    """A position on a chess board. Has a row and column."""
+    """A position on a chess board. Has a row and column.
+
+    Positions are immutable and interned: Position(row, col) and Position.at(square)
+    return one of 64 shared instances, so positions can be compared by identity and
+    used in sets and as dict keys.
+    """
+    __slots__ = ("row", "col", "square")
 
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
+    def __new__(cls, row, col):
+        if 0 <= row < 8 and 0 <= col < 8:
+            return SQUARES[row * 8 + col]
+        return cls._make(row, col)
+
+    @classmethod
+    def _make(cls, row, col):
+        self = object.__new__(cls)
+        object.__setattr__(self, "row", row)
+        object.__setattr__(self, "col", col)
+        object.__setattr__(self, "square", row * 8 + col)
+        return self
+
+    @staticmethod
+    def at(square):
+        """Returns the shared Position of a bit index (0..63)"""
+        return SQUARES[square]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self):
+        return Position, (self.row, self.col)
 
     def __str__(self):
         return f"({self.row}, {self.col})"
@@ -68,7 +297,26 @@ class Position:
         return f"Position({self.row}, {self.col})"
 
     def __eq__(self, other):
-        return self.row == other.row and self.col == other.col
+        return self is other or (isinstance(other, Position) and self.row == other.row and self.col == other.col)
+
+    def __hash__(self):
+        return self.square
+
+
+SQUARES = tuple(Position._make(square >> 3, square & 7) for square in range(64))
+
+# chessTables targets as shared Positions, so move lists allocate nothing
+KNIGHT_POSITIONS = tuple(tuple(Position.at(row * 8 + col) for row, col in targets)
+                         for targets in chessTables.KNIGHT_TARGETS)
+KING_POSITIONS = tuple(tuple(Position.at(row * 8 + col) for row, col in targets)
+                       for targets in chessTables.KING_TARGETS)
+PAWN_PUSH_POSITIONS = tuple(tuple(tuple(Position.at(row * 8 + col) for row, col in targets) for targets in by_color)
+                            for by_color in chessTables.PAWN_PUSH_TARGETS)
+PAWN_CAPTURE_POSITIONS = tuple(tuple(tuple(Position.at(row * 8 + col) for row, col in targets)
+                                     for targets in by_color) for by_color in chessTables.PAWN_CAPTURE_TARGETS)
+SLIDER_RAYS = {BISHOP: chessTables.BISHOP_RAYS, ROOK: chessTables.ROOK_RAYS, QUEEN: chessTables.QUEEN_RAYS}
+RAY_POSITIONS = tuple(tuple(tuple(Position.at(row * 8 + col) for row, col in ray) for ray in by_direction)
+                      for by_direction in chessTables.RAYS)
 
 
 # class Move:
@@ -92,7 +340,11 @@ class Piece:
     color: Color.WHITE or Color.BLACK
     name: {pawn, rook, knight, bishop, queen, king}
     value: value of piece in pawns
+
+    The colour and the type are stored as integer codes (side: WHITE/BLACK,
+    kind: PAWN..KING); color and name are views on them.
     """
+    __slots__ = ("side", "kind", "value", "position", "first_move")
 
     def __init__(self, color: Color = Color.WHITE, name: str = "pawn", value: int = None, position: Position = None,
                  first_move: bool = True):
@@ -105,12 +357,28 @@ class Piece:
             position (Position, optional): _description_. Defaults to None.
             first_move (bool, optional): _description_. Defaults to True.
         """
-        self.color = color
-        self.name = name
+        self.side = COLOR_INDEX[color]
+        self.kind = PIECE_CODES[name]
         self.value = value
         self.position = position
         self.first_move = first_move
 
+    @property
+    def color(self):
+        return COLORS[self.side]
+
+    @color.setter
+    def color(self, color):
+        self.side = COLOR_INDEX[color]
+
+    @property
+    def name(self):
+        return PIECE_NAMES[self.kind]
+
+    @name.setter
+    def name(self, name):
+        self.kind = PIECE_CODES[name]
+
     def __str__(self):
         return ("White" if self.color == Color.WHITE else "Black") + " *" + self.name + "* "
 
@@ -121,241 +389,97 @@ class Piece:
         """Returns a list of all possible moves for a piece
 
         Args:
-            board_arr (_type_): _description_
-            prev_board_arr (_type_): _description_
+            board_arr (list): 8x8 array of pieces, see Board.get_piece_arr
 
         Returns:
-            _type_: _description_
+            list: Positions the piece can move to without capturing
         """
-        pos = self.position
+        square = self.position.square
+        kind = self.kind
         moves = []
-        if self.name == "pawn":
-            if self.color == Color.WHITE:
-                if self.position.row != 7 and board_arr[self.position.row + 1][self.position.col] == None:
-                    moves.append(
-                        Position(self.position.row + 1, self.position.col))
-                if self.position.row == 1 and board_arr[self.position.row + 2][self.position.col] == None and board_arr[self.position.row + 1][self.position.col] == None:
-                    moves.append(
-                        Position(self.position.row + 2, self.position.col))
-            if self.color == Color.BLACK:
-                if self.position.row != 0 and board_arr[self.position.row - 1][self.position.col] == None:
-                    moves.append(
-                        Position(self.position.row - 1, self.position.col))
-                if self.position.row == 6 and board_arr[self.position.row - 2][self.position.col] == None and board_arr[self.position.row - 1][self.position.col] == None:
-                    moves.append(
-                        Position(self.position.row - 2, self.position.col))
-
-        if self.name == "rook" or self.name == "queen":
-            for i in range(self.position.row + 1, 8):
-                if board_arr[i][self.position.col] == None:
-                    moves.append(Position(i, self.position.col))
-                else:
-                    break
-            for i in range(self.position.row - 1, -1, -1):
-                if board_arr[i][self.position.col] == None:
-                    moves.append(Position(i, self.position.col))
-                else:
-                    break
-            for i in range(self.position.col + 1, 8):
-                if board_arr[self.position.row][i] == None:
-                    moves.append(Position(self.position.row, i))
-                else:
-                    break
-            for i in range(self.position.col - 1, -1, -1):
-                if board_arr[self.position.row][i] == None:
-                    moves.append(Position(self.position.row, i))
-                else:
+        if kind == PAWN:
+            for pos in PAWN_PUSH_POSITIONS[self.side][square]:
+                if board_arr[pos.row][pos.col] is not None:
                     break
+                moves.append(pos)
 
-        if self.name == "knight":
-            for i in range(-2, 3):
-                for j in range(-2, 3):
-                    if abs(i) + abs(j) == 3:
-                        if 0 <= self.position.row + i < 8 and 0 <= self.position.col + j < 8 and (
-                                board_arr[self.position.row + i][self.position.col + j] == None):
-                            moves.append(
-                                Position(self.position.row + i, self.position.col + j))
-
-        if self.name == "bishop" or self.name == "queen":
-            for i in range(1, 9):
-                #print(i)
-                if self.position.row + i <= 7 and self.position.col + i <= 7:
-                    if board_arr[self.position.row + i][self.position.col + i] == None:
-                        moves.append(
-                            Position(self.position.row + i, self.position.col + i))
-                    else:
-                        break
-                else:
-                    break
-            for i in range(1, 9):
-                #print(i)
-                if self.position.row + i <= 7 and self.position.col - i >= 0:
-                    if board_arr[self.position.row + i][self.position.col - i] == None:
-                        moves.append(
-                            Position(self.position.row + i, self.position.col - i))
-                    else:
+        if kind == ROOK or kind == QUEEN:
+            for direction in chessTables.ROOK_RAYS:
+                for pos in RAY_POSITIONS[direction][square]:
+                    if board_arr[pos.row][pos.col] is not None:
                         break
-                else:
-                    break
-            for i in range(1, 9):
-                #print(i)
-                if self.position.row - i >= 0 and self.position.col + i <= 7:
-                    if board_arr[self.position.row - i][self.position.col + i] == None:
-                        moves.append(
-                            Position(self.position.row - i, self.position.col + i))
-                    else:
-                        break
-                else:
-                    break
-            for i in range(1, 9):
-                #print(i)
-                if self.position.row - i >= 0 and self.position.col - i >= 0:
-                    if board_arr[self.position.row - i][self.position.col - i] == None:
-                        moves.append(
-                            Position(self.position.row - i, self.position.col - i))
-                    else:
+                    moves.append(pos)
+
+        if kind == KNIGHT:
+            for pos in KNIGHT_POSITIONS[square]:
+                if board_arr[pos.row][pos.col] is None:
+                    moves.append(pos)
+
+        if kind == BISHOP or kind == QUEEN:
+            for direction in chessTables.BISHOP_RAYS:
+                for pos in RAY_POSITIONS[direction][square]:
+                    if board_arr[pos.row][pos.col] is not None:
                         break
-                else:
-                    break
-        if self.name == "king":
-            for i in range(-1, 2):
-                for j in range(-1, 2):
-                    if 0 <= self.position.row + i < 8 and 0 <= self.position.col + j < 8 and (
-                            board_arr[self.position.row + i][self.position.col + j] == None):
-                        moves.append(
-                            Position(self.position.row + i, self.position.col + j))
-                        
-            if self.color == Color.WHITE and self.first_move:
-                if board_arr[0][3] == None and board_arr[0][2] == None and board_arr[0][1] == None and board_arr[0][
-                    0] != None and board_arr[0][0].name == "rook" and board_arr[0][0].first_move:
-                    moves.append(Position(0, 2))
-                if board_arr[0][5] == None and board_arr[0][6] == None and board_arr[0][7] != None and board_arr[0][
-                    7].name == "rook" and board_arr[0][7].first_move:
-                    moves.append(Position(0, 6))
-            if self.color == Color.BLACK and self.first_move:
-                if board_arr[7][3] == None and board_arr[7][2] == None and board_arr[7][1] == None and board_arr[7][
-                    0] != None and board_arr[7][0].name == "rook" and board_arr[7][0].first_move:
-                    moves.append(Position(7, 2))
-                if board_arr[7][5] == None and board_arr[7][6] == None and board_arr[7][7] != None and board_arr[7][
-                    7].name == "rook" and board_arr[7][7].first_move:
-                    moves.append(Position(7, 6))
-        
-        #for move in moves:
-            #if board_arr[move.row][move.col].color != None:
-                #moves.pop(move)
+                    moves.append(pos)
+
+        if kind == KING:
+            for pos in KING_POSITIONS[square]:
+                if board_arr[pos.row][pos.col] is None:
+                    moves.append(pos)
+
+            if self.first_move:
+                row = 0 if self.side == WHITE else 7
+                back_rank = board_arr[row]
+                rook = back_rank[0]
+                if back_rank[3] is None and back_rank[2] is None and back_rank[1] is None and rook is not None \
+                        and rook.kind == ROOK and rook.first_move:
+                    moves.append(SQUARES[row * 8 + 2])
+                rook = back_rank[7]
+                if back_rank[5] is None and back_rank[6] is None and rook is not None \
+                        and rook.kind == ROOK and rook.first_move:
+                    moves.append(SQUARES[row * 8 + 6])
         return moves
 
     def correct_captures(self, board_arr):
+        """Returns a list of all enemy pieces a piece can capture
+
+        Args:
+            board_arr (list): 8x8 array of pieces, see Board.get_piece_arr
+
+        Returns:
+            list: Positions of the capturable pieces
+        """
+        square = self.position.square
+        kind = self.kind
         captures = []
 
-        if self.name == "pawn":  # pawn captures
-            if self.color == Color.WHITE:
-                if self.position.row != 7 and self.position.col != 0 and board_arr[self.position.row + 1][
-                    self.position.col - 1] != None and board_arr[self.position.row + 1][
-                    self.position.col - 1].color == Color.BLACK:
-                    captures.append(
-                        Position(self.position.row + 1, self.position.col - 1))
-                if self.position.row != 7 and self.position.col != 7 and board_arr[self.position.row + 1][
-                    self.position.col + 1] != None and board_arr[self.position.row + 1][
-                    self.position.col + 1].color == Color.BLACK:
-                    captures.append(
-                        Position(self.position.row + 1, self.position.col + 1))
-            if self.color == Color.BLACK:
-                if self.position.row != 0 and self.position.col != 0 and board_arr[self.position.row - 1][
-                    self.position.col - 1] != None and board_arr[self.position.row - 1][
-                    self.position.col - 1].color == Color.WHITE:
-                    captures.append(
-                        Position(self.position.row - 1, self.position.col - 1))
-                if self.position.row != 0 and self.position.col != 7 and board_arr[self.position.row - 1][
-                    self.position.col + 1] != None and board_arr[self.position.row - 1][
-                    self.position.col + 1].color == Color.WHITE:
-                    captures.append(
-                        Position(self.position.row - 1, self.position.col + 1))
-        if self.name == "knight":
-            for i in range(-2, 3):
-                for j in range(-2, 3):
-                    if abs(i) + abs(j) == 3:
-                        if 0 <= self.position.row + i < 8 and 0 <= self.position.col + j < 8 and (
-                                board_arr[self.position.row + i][self.position.col + j] is not None):
-                            captures.append(
-                                Position(self.position.row + i, self.position.col + j))
-        if self.name == "rook" or self.name == "queen":
-            for i in range(self.position.row + 1, 8):
-                if board_arr[i][self.position.col] is not None:
-                    captures.append(Position(i, self.position.col))
-                    break
-            for i in range(self.position.row - 1, -1, -1):
-                if board_arr[i][self.position.col] is not None:
-                    captures.append(Position(i, self.position.col))
-                    break
-            for i in range(self.position.col + 1, 8):
-                if board_arr[self.position.row][i] is not None:
-                    captures.append(Position(self.position.row, i))
-                    break
-            for i in range(self.position.col - 1, -1, -1):
-                if board_arr[self.position.row][i] is not None:
-                    captures.append(Position(self.position.row, i))
-                    break
-        if self.name == "bishop" or self.name == "queen":
-            for i in range(1, 9):
-                if self.position.row + i <= 7 and self.position.col + i <= 7:
-                    if board_arr[self.position.row + i][self.position.col + i] is not None:
-                        captures.append(Position(self.position.row + i, self.position.col + i))
-                        break
-                else:
-                    break
-            for i in range(1, 9):
-                if self.position.row + i <= 7 and self.position.col - i >= 0:
-                    if board_arr[self.position.row + i][self.position.col - i] is not None:
-                        captures.append(Position(self.position.row + i, self.position.col - i))
-                        break
-                else:
-                    break
-            for i in range(1, 9):
-                if self.position.row - i >= 0 and self.position.col + i <= 7:
-                    if board_arr[self.position.row - i][self.position.col + i] is not None:
-                        captures.append(Position(self.position.row - i, self.position.col + i))
-                        break
-                else:
-                    break
-            for i in range(1, 9):
-                if self.position.row - i >= 0 and self.position.col - i >= 0:
-                    if board_arr[self.position.row - i][self.position.col - i] is not None:
-                        captures.append(Position(self.position.row - i, self.position.col - i))
+        if kind == PAWN:  # pawn captures
+            targets = PAWN_CAPTURE_POSITIONS[self.side][square]
+        elif kind == KNIGHT:
+            targets = KNIGHT_POSITIONS[square]
+        elif kind == KING:
+            targets = KING_POSITIONS[square]
+        else:
+            targets = []
+            for direction in SLIDER_RAYS[kind]:
+                for pos in RAY_POSITIONS[direction][square]:
+                    if board_arr[pos.row][pos.col] is not None:
+                        targets.append(pos)
                         break
-                else:
-                    break
-        if self.name == "king":
-            for i in range(-1, 2):
-                for j in range(-1, 2):
-                    if 0 <= self.position.row + i < 8 and 0 <= self.position.col + j < 8 and (
-                            board_arr[self.position.row + i][self.position.col + j] is not None):
-                        captures.append(Position(self.position.row + i, self.position.col + j))
-        new_captures = []
-        for move in captures: 
-            #print(move)
-            #print(board_arr)
-            if board_arr[move.row][move.col].color != self.color:
-                new_captures.append(move)
-        return new_captures
+        for pos in targets:
+            target = board_arr[pos.row][pos.col]
+            if target is not None and target.side != self.side:
+                captures.append(pos)
+        return captures
 
     @classmethod
     def get_value(cls, name):
         """
         Returns the value of a piece in pawns
         """
-        if name == "pawn":
-            return 1
-        elif name == "knight" or name == "bishop":
-            return 3
-        elif name == "rook":
-            return 5
-        elif name == "queen":
-            return 9
-        elif name == "king":
-            return 0
-        else:
+        if name not in PIECE_CODES:
             raise ValueError("Invalid piece name")
+        return PIECE_VALUES[PIECE_CODES[name]]
 
     @classmethod
     def get_start_position(cls, name, color):
@@ -402,13 +526,356 @@ class Piece:
 
 
 class Board:
-    def __init__(self, pieces=None, active_color=Color.WHITE):
+    """
+    Chess position
+
+    mailbox: 64 squares (row * 8 + col), each a Piece or None
+    bitboards: bitboards[side][kind], see the bitboard helpers above
+    castling: castling rights, WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+    ep_square: square a pawn can capture en passant onto, or None
+    key: Zobrist hash of the position, kept up to date by make_move/unmake_move
+    middlegame, endgame: material + piece-square sums from white's side, kept up to date the same way
+    phase: game phase, see PHASE_WEIGHTS
+    king_square: square of each side's king, None once it is captured
+    halfmove_clock: plies since the last capture or pawn move, for the fifty move rule
+    undo_stack: one record per make_move, popped by unmake_move
+    attacks_from, attacked_by: attack set of the piece on every square and of each side, only kept
+        up to date after track_attacks(), None otherwise
+    """
+    debug = False  # check the Zobrist key and evaluation sums against a full recomputation after every move
+
+    def __init__(self, pieces=None, active_color=Color.WHITE, castling=None, ep_square=None, halfmove_clock=0,
+                 fullmove_number=1):
         if pieces is None:
-            self.pieces = Board.new_board()
-        else:
-            self.pieces = pieces
+            pieces = Board.new_board()
         self.score = {Color.BLACK: 0, Color.WHITE: 0}
-        self.active_color = active_color
+        self.side = COLOR_INDEX[active_color]
+        self.mailbox = [None] * 64
+        self.bitboards = [[0] * 6, [0] * 6]
+        self.occupied_by = [0, 0]
+        self.key = 0
+        self.middlegame = 0
+        self.endgame = 0
+        self.phase = 0
+        self.king_square = [None, None]
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.undo_stack = []
+        self.attacks_from = None
+        self.attacked_by = None
+        self.attack_stack = []
+        for piece in pieces:
+            self._put_piece(piece)
+        self.castling = self._castling_rights(castling)
+        self.ep_square = None
+        # same rule as make_move: only a square an enemy pawn can take on counts
+        if ep_square is not None and \
+                chessTables.PAWN_ATTACKS[self.side ^ 1][ep_square] & self.bitboards[self.side][PAWN]:
+            self.ep_square = ep_square
+        self.key = self.compute_key()
+
+    def _castling_rights(self, castling):
+        """Keeps only the rights whose king and rook are on their home squares
+
+        If `castling` is None the rights are taken from the first_move flags,
+        otherwise the first_move flags of the home kings and rooks follow the rights.
+        """
+        rights = 0
+        for right, (side, king_square, rook_square) in CASTLING_PIECES.items():
+            king, rook = self.mailbox[king_square], self.mailbox[rook_square]
+            if king is None or rook is None or (king.side, king.kind, rook.side, rook.kind) != (side, KING, side, ROOK):
+                continue
+            if castling is None:
+                if king.first_move and rook.first_move:
+                    rights |= right
+            elif castling & right:
+                rights |= right
+        if castling is not None:
+            for right, (side, king_square, rook_square) in CASTLING_PIECES.items():
+                for square in (king_square, rook_square):
+                    piece = self.mailbox[square]
+                    if piece is not None and piece.kind in (KING, ROOK):
+                        piece.first_move = bool(rights & CASTLING_RIGHTS_OF[square])
+        return rights
+
+    def compute_key(self):
+        """Computes the Zobrist hash of the position from scratch"""
+        key = 0
+        for square, piece in enumerate(self.mailbox):
+            if piece is not None:
+                key ^= ZOBRIST_PIECES[piece.side][piece.kind][square]
+        if self.side == BLACK:
+            key ^= ZOBRIST_SIDE
+        key ^= ZOBRIST_CASTLING[self.castling]
+        if self.ep_square is not None:
+            key ^= ZOBRIST_EP[self.ep_square & 7]
+        return key
+
+    def compute_evaluation(self):
+        """Computes the (middlegame, endgame, phase) of the position from scratch"""
+        middlegame = endgame = phase = 0
+        for square, piece in enumerate(self.mailbox):
+            if piece is not None:
+                middlegame += EVAL_MIDDLEGAME[piece.side][piece.kind][square]
+                endgame += EVAL_ENDGAME[piece.side][piece.kind][square]
+                phase += PHASE_WEIGHTS[piece.kind]
+        return middlegame, endgame, phase
+
+    def check_key(self):
+        """Raises ZobristMismatch if the incremental key or evaluation has drifted from the position"""
+        if self.key != self.compute_key():
+            raise ZobristMismatch(f"{self.get_FEN()} incremental {self.key:016x}, expected {self.compute_key():016x}")
+        if (self.middlegame, self.endgame, self.phase) != self.compute_evaluation():
+            raise ZobristMismatch(f"{self.get_FEN()} incremental evaluation "
+                                  f"{self.middlegame, self.endgame, self.phase}, expected {self.compute_evaluation()}")
+        if self.attacks_from is not None and \
+                self.attacked_by != [self.compute_attack_map(WHITE), self.compute_attack_map(BLACK)]:
+            raise ZobristMismatch(f"{self.get_FEN()} incremental attack maps differ from the position")
+
+    @property
+    def pieces(self):
+        """All pieces on the board, in square order"""
+        return [piece for piece in self.mailbox if piece is not None]
+
+    @property
+    def active_color(self):
+        return COLORS[self.side]
+
+    @active_color.setter
+    def active_color(self, color):
+        if COLOR_INDEX[color] != self.side:
+            self.side ^= 1
+            self.key ^= ZOBRIST_SIDE
+
+    @classmethod
+    def bitboards_from_pieces(cls, pieces):
+        """Builds per colour and per piece type bitboards from a list of pieces
+
+        Returns:
+            list: bitboards[side][kind]
+        """
+        bitboards = [[0] * 6, [0] * 6]
+        for piece in pieces:
+            bitboards[piece.side][piece.kind] |= 1 << piece.position.square
+        return bitboards
+
+    @classmethod
+    def pieces_from_bitboards(cls, bitboards):
+        """Builds a list of pieces from per colour and per piece type bitboards
+
+        Args:
+            bitboards (list): bitboards[side][kind]
+        """
+        pieces = []
+        for side in (WHITE, BLACK):
+            for kind in range(6):
+                for square in iter_bits(bitboards[side][kind]):
+                    pieces.append(Piece(COLORS[side], PIECE_NAMES[kind], PIECE_VALUES[kind], Position.at(square)))
+        return pieces
+
+    @classmethod
+    def from_bitboards(cls, bitboards, active_color=Color.WHITE, castling=ALL_CASTLING, ep_square=None):
+        """Generates a board from per colour and per piece type bitboards"""
+        return cls(cls.pieces_from_bitboards(bitboards), active_color, castling, ep_square)
+
+    def occupancy(self, side=None):
+        """Returns the bitboard of all squares occupied by `side` (or by anyone)"""
+        if side is None:
+            return self.occupied_by[WHITE] | self.occupied_by[BLACK]
+        return self.occupied_by[side]
+
+    def piece_on(self, square):
+        """Returns (side, kind) of whatever stands on `square`, or None"""
+        piece = self.mailbox[square]
+        if piece is None:
+            return None
+        return piece.side, piece.kind
+
+    def _remove_piece(self, piece):
+        """Takes `piece` off the mailbox and the bitboards. Must be called before its position changes"""
+        square = piece.position.square
+        side, kind = piece.side, piece.kind
+        bit = 1 << square
+        self.mailbox[square] = None
+        self.bitboards[side][kind] ^= bit
+        self.occupied_by[side] ^= bit
+        self.key ^= ZOBRIST_PIECES[side][kind][square]
+        self.middlegame -= EVAL_MIDDLEGAME[side][kind][square]
+        self.endgame -= EVAL_ENDGAME[side][kind][square]
+        self.phase -= PHASE_WEIGHTS[kind]
+        if kind == KING:
+            self.king_square[side] = None
+
+    def _put_piece(self, piece):
+        """Puts `piece` on the mailbox and the bitboards at its current position"""
+        square = piece.position.square
+        side, kind = piece.side, piece.kind
+        bit = 1 << square
+        self.mailbox[square] = piece
+        self.bitboards[side][kind] |= bit
+        self.occupied_by[side] |= bit
+        self.key ^= ZOBRIST_PIECES[side][kind][square]
+        self.middlegame += EVAL_MIDDLEGAME[side][kind][square]
+        self.endgame += EVAL_ENDGAME[side][kind][square]
+        self.phase += PHASE_WEIGHTS[kind]
+        if kind == KING:
+            self.king_square[side] = square
+
+    def make_move(self, move):
+        """Plays a move, remembering everything unmake_move needs to take it back
+
+        Handles captures, en passant, castling (the rook moves along with the king)
+        and promotion, and updates the castling rights, the en passant square and
+        the Zobrist key. The move is not validated.
+
+        Args:
+            move (int): packed move, see pack_move
+        """
+        from_square = move & 63
+        to_square = move >> 6 & 63
+        flag = move >> 12
+        piece = self.mailbox[from_square]
+        if flag == EP_CAPTURE:
+            captured = self.mailbox[to_square ^ 8]  # the pawn that just passed
+        else:
+            captured = self.mailbox[to_square]
+        self.undo_stack.append((move, piece, captured, piece.first_move, self.castling, self.ep_square, self.key,
+                                self.halfmove_clock))
+        if self.attacks_from is not None:
+            occupied = self.occupied_by[WHITE] | self.occupied_by[BLACK]
+        key = self.key ^ ZOBRIST_SIDE ^ ZOBRIST_CASTLING[self.castling]
+        if self.ep_square is not None:
+            key ^= ZOBRIST_EP[self.ep_square & 7]
+        self.key = key
+        if captured is not None:
+            self._remove_piece(captured)
+        self._remove_piece(piece)
+        if flag & PROMOTION:
+            piece.kind = (flag & 3) + KNIGHT
+            piece.value = PIECE_VALUES[piece.kind]
+        piece.position = SQUARES[to_square]
+        piece.first_move = False
+        self._put_piece(piece)
+        if flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            rook_from, rook_to = CASTLING_ROOK_SQUARES[to_square]
+            rook = self.mailbox[rook_from]
+            self._remove_piece(rook)
+            rook.position = SQUARES[rook_to]
+            rook.first_move = False
+            self._put_piece(rook)
+
+        self.castling &= CASTLING_MASKS[from_square] & CASTLING_MASKS[to_square]
+        if captured is not None or flag & PROMOTION or piece.kind == PAWN:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if self.side == BLACK:
+            self.fullmove_number += 1
+        self.ep_square = None
+        if flag == DOUBLE_PAWN_PUSH:
+            ep_square = (from_square + to_square) >> 1
+            # only remember it when an enemy pawn can actually take, so equal positions hash equally
+            if chessTables.PAWN_ATTACKS[piece.side][ep_square] & self.bitboards[piece.side ^ 1][PAWN]:
+                self.ep_square = ep_square
+                self.key ^= ZOBRIST_EP[ep_square & 7]
+        self.key ^= ZOBRIST_CASTLING[self.castling]
+        self.side ^= 1
+        if self.attacks_from is not None:
+            self._update_attacks(occupied ^ self.occupied_by[WHITE] ^ self.occupied_by[BLACK] | 1 << to_square)
+        if self.debug:
+            self.check_key()
+
+    def unmake_move(self):
+        """Takes back the last move played with make_move"""
+        move, piece, captured, first_move, castling, ep_square, key, halfmove_clock = self.undo_stack.pop()
+        flag = move >> 12
+        self.side ^= 1
+        if self.side == BLACK:
+            self.fullmove_number -= 1
+        if flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            rook_from, rook_to = CASTLING_ROOK_SQUARES[move >> 6 & 63]
+            rook = self.mailbox[rook_to]
+            self._remove_piece(rook)
+            rook.position = SQUARES[rook_from]
+            rook.first_move = True
+            self._put_piece(rook)
+        self._remove_piece(piece)
+        if flag & PROMOTION:
+            piece.kind = PAWN
+            piece.value = PIECE_VALUES[PAWN]
+        piece.position = SQUARES[move & 63]
+        piece.first_move = first_move
+        self._put_piece(piece)
+        if captured is not None:
+            self._put_piece(captured)
+        self.castling = castling
+        self.ep_square = ep_square
+        self.key = key
+        self.halfmove_clock = halfmove_clock
+        if self.attacks_from is not None:
+            if self.attack_stack:
+                self.attacks_from, self.attacked_by = self.attack_stack.pop()
+            else:  # the move was made before tracking started
+                self.track_attacks()
+        if self.debug:
+            self.check_key()
+
+    def make_null_move(self):
+        """Passes the turn without moving, for null move pruning; taken back by unmake_null_move"""
+        self.undo_stack.append((NULL_MOVE, None, None, None, self.castling, self.ep_square, self.key,
+                                self.halfmove_clock))
+        if self.ep_square is not None:
+            self.key ^= ZOBRIST_EP[self.ep_square & 7]
+            self.ep_square = None
+        self.key ^= ZOBRIST_SIDE
+        self.halfmove_clock += 1
+        if self.side == BLACK:
+            self.fullmove_number += 1
+        self.side ^= 1
+        if self.debug:
+            self.check_key()
+
+    def unmake_null_move(self):
+        """Takes back the last make_null_move"""
+        _, _, _, _, _, self.ep_square, self.key, self.halfmove_clock = self.undo_stack.pop()
+        self.side ^= 1
+        if self.side == BLACK:
+            self.fullmove_number -= 1
+
+    def move_code(self, from_square, to_square, promotion=QUEEN):
+        """Packs the move of the piece on `from_square` to `to_square`, working its flag out from the position
+
+        Args:
+            from_square (int): square of the moving piece
+            to_square (int): target square
+            promotion (int, optional): kind a pawn reaching the last rank turns into
+        """
+        piece = self.mailbox[from_square]
+        flag = QUIET_MOVE
+        if piece.kind == PAWN:
+            if to_square == self.ep_square:
+                return pack_move(from_square, to_square, EP_CAPTURE)
+            if abs(to_square - from_square) == 16:
+                flag = DOUBLE_PAWN_PUSH
+            elif (1 << to_square) & PROMOTION_RANKS[piece.side]:
+                flag = PROMOTION | promotion - KNIGHT
+        elif piece.kind == KING and abs(to_square - from_square) == 2:
+            flag = KING_CASTLE if to_square > from_square else QUEEN_CASTLE
+        if self.mailbox[to_square] is not None:
+            flag |= CAPTURE
+        return pack_move(from_square, to_square, flag)
+
+    def move_from_list(self, move):
+        """Packs a move given in the old list form, see move_to_list"""
+        promotion = move[2] if len(move) > 2 else QUEEN
+        return self.move_code(move[0][0] * 8 + move[0][1], move[1][0] * 8 + move[1][1], promotion)
+
+    def move_from_uci(self, uci):
+        """Packs a move given as a UCI string, e.g. e2e4 or e7e8n"""
+        from_square = (int(uci[1]) - 1) * 8 + "abcdefgh".index(uci[0])
+        to_square = (int(uci[3]) - 1) * 8 + "abcdefgh".index(uci[2])
+        promotion = FEN_LETTERS.index(uci[4]) if len(uci) > 4 else QUEEN
+        return self.move_code(from_square, to_square, promotion)
 
     @classmethod
     def new_board(cls):
@@ -463,65 +930,32 @@ class Board:
                 if arr[i][j] != "":
                     pieces.append(Piece(FEN_pieces[arr[i][j]][1], FEN_pieces[arr[i][j]][0], Piece.get_value(
                         FEN_pieces[arr[i][j]][0]), Position(7 - i, j)))
-        brd = cls(pieces)
-        if FEN_list[1] == 'b':
-            brd.active_color = Color.BLACK
-        else:
-            brd.active_color = Color.WHITE
-        return brd
-
-    def move_piece(self, piece: Piece, new_pos: Position):
-        arr = self.get_piece_arr()
-        corr_moves = piece.correct_moves(arr)
-        corr_captures = piece.correct_captures(arr)
-        #print(corr_moves)
-        if piece.color != self.active_color:
+        active_color = Color.BLACK if len(FEN_list) > 1 and FEN_list[1] == 'b' else Color.WHITE
+        castling = None
+        if len(FEN_list) > 2:
+            castling = 0
+            for right, letter in CASTLING_FEN:
+                if letter in FEN_list[2]:
+                    castling |= right
+        ep_square = None
+        if len(FEN_list) > 3 and FEN_list[3] != "-":
+            ep_square = (int(FEN_list[3][1]) - 1) * 8 + "abcdefgh".index(FEN_list[3][0])
+        halfmove_clock = int(FEN_list[4]) if len(FEN_list) > 4 and FEN_list[4].isdigit() else 0
+        fullmove_number = int(FEN_list[5]) if len(FEN_list) > 5 and FEN_list[5].isdigit() else 1
+        return cls(pieces, active_color, castling, ep_square, halfmove_clock, fullmove_number)
+
+    def move_piece(self, piece: Piece, new_pos: Position, promotion=QUEEN):
+        if piece.side != self.side:
             return False
-        
-        if new_pos in corr_moves:
-            if piece.name == "king":
-                if piece.color == Color.WHITE:
-                    print(new_pos, Position(0, 6), new_pos == Position(0, 6), piece.first_move)
-                    if new_pos == Position(0, 2) and piece.first_move:
-                        print(2)
-                        rook = arr[0][0]
-                        rook.position = Position(0, 3)
-                        rook.first_move = False
-                    if new_pos == Position(0, 6) and piece.first_move:
-                        print(6)
-                        rook = arr[0][7]
-                        rook.position = Position(0, 5)
-                        rook.first_move = False
-                else:
-                    if new_pos == Position(7, 2) and piece.first_move:
-                        rook = arr[7][0]
-                        rook.position = Position(7, 3)
-                        rook.first_move = False
-                    if new_pos == Position(7, 6) and piece.first_move:
-                        rook = arr[7][7]
-                        rook.position = Position(7, 5)
-                        rook.first_move = False
-            elif piece.name == "pawn":
-                if piece.color == Color.WHITE and new_pos.row == 7:
-                    piece.name = "queen"
-                    piece.value = 9
-                if piece.color == Color.BLACK and new_pos.row == 0:
-                    piece.name = "queen"
-                    piece.value = 9
-                    
-            piece.position = new_pos
-            piece.first_move = False
-            self.active_color = Color.BLACK if self.active_color == Color.WHITE else Color.WHITE
-            return True
 
-        elif new_pos in corr_captures:
-            eaten_piece = arr[new_pos.row][new_pos.col]
-            self.pieces.remove(eaten_piece)
-            self.score[piece.color] += eaten_piece.value
-            piece.first_move = False
-            
-            piece.position = new_pos
-            self.active_color = Color.BLACK if self.active_color == Color.WHITE else Color.WHITE
+        move = self.move_code(piece.position.square, new_pos.square, promotion)
+        if move in self.legal_moves():
+            eaten_piece = self.mailbox[new_pos.square]
+            if move_flag(move) == EP_CAPTURE:
+                eaten_piece = self.mailbox[new_pos.square ^ 8]
+            if eaten_piece is not None:
+                self.score[piece.color] += eaten_piece.value
+            self.make_move(move)
             return True
 
         return False
@@ -530,10 +964,7 @@ class Board:
         """
         Returns a 2d array of the board
         """
-        arr = [[None for _ in range(8)] for _ in range(8)]
-        for piece in self.pieces:
-            arr[piece.position.row][piece.position.col] = piece
-        return arr
+        return [self.mailbox[row * 8:row * 8 + 8] for row in range(8)]
 
     def get_str_arr(self):
         """
@@ -541,8 +972,7 @@ class Board:
         """
         arr = [["  " for i in range(8)] for j in range(8)]
         for piece in self.pieces:
-            arr[7 - piece.position.row][piece.position.col] = {Color.BLACK: "B", Color.WHITE: "W"}[piece.color] + {
-                "pawn": "P", "rook": "R", "knight": "N", "bishop": "B", "queen": "Q", "king": "K"}[piece.name]
+            arr[7 - piece.position.row][piece.position.col] = "WB"[piece.side] + FEN_LETTERS[piece.kind].upper()
         return arr
 
     def __str__(self):
@@ -553,78 +983,530 @@ class Board:
         """
         generates a FEN notation of a current position on a board
         """
-        FEN_arr = ["-", "-", "-", "-", "-", "-", "-"]
-        arr = self.get_str_arr()
-        FEN_dict = {"BP": 'p', "WP": 'P', "BN": 'n', "WN": 'N', "BR": 'r', "WR": 'R', "BB": 'b', "WB": 'B',
-                    "BQ": 'q', "WQ": 'Q', "BK": 'k', "WK": 'K'}
+        FEN_arr = ["-", "-", "-", "-", "-", "-"]
+        squares = [None] * 64
+        for side in (WHITE, BLACK):
+            for kind, bb in enumerate(self.bitboards[side]):
+                letter = FEN_LETTERS[kind].upper() if side == WHITE else FEN_LETTERS[kind]
+                for square in iter_bits(bb):
+                    squares[square] = letter
         pos_array = []
-        for _ in arr:
+        for row in range(7, -1, -1):
             free_tiles = 0
-            for piece in _:
-                if piece =="  ":
-                    free_tiles+=1
+            for piece in squares[row * 8:row * 8 + 8]:
+                if piece is None:
+                    free_tiles += 1
                 else:
                     if free_tiles != 0:
                         pos_array.append(str(free_tiles))
                         free_tiles = 0
-                    pos_array.append(FEN_dict[piece])
+                    pos_array.append(piece)
             if free_tiles != 0:
                 pos_array.append(str(free_tiles))
             pos_array.append("/")
         pos_array.pop()
         FEN_arr[0] = "".join(pos_array)
 
-        if self.active_color == Color.BLACK:
+        if self.side == BLACK:
             FEN_arr[1] = "b"
         else:
             FEN_arr[1] = "w"
+        FEN_arr[2] = "".join(letter for right, letter in CASTLING_FEN if self.castling & right) or "-"
+        if self.ep_square is not None:
+            FEN_arr[3] = "abcdefgh"[self.ep_square & 7] + str((self.ep_square >> 3) + 1)
+        FEN_arr[4] = str(self.halfmove_clock)
+        FEN_arr[5] = str(self.fullmove_number)
 
         return " ".join(FEN_arr)
 
+    def piece_targets(self, side, kind, square, occupied=None, enemy=None):
+        """Returns the quiet move and capture targets of a piece as two bitboards
+
+        Args:
+            side (int): WHITE or BLACK
+            kind (int): PAWN..KING
+            square (int): bit index of the piece
+            occupied (int, optional): occupancy of the board, computed if not given
+            enemy (int, optional): occupancy of the opponent, computed if not given
+
+        Returns:
+            tuple: (quiet bitboard, capture bitboard)
+        """
+        if enemy is None:
+            enemy = self.occupied_by[side ^ 1]
+        if occupied is None:
+            occupied = enemy | self.occupied_by[side]
+        empty = FULL ^ occupied
+        if kind == PAWN:
+            push = chessTables.PAWN_PUSHES[side][square] & empty
+            if push and (1 << square) & PAWN_START_RANKS[side]:
+                push |= chessTables.PAWN_PUSHES[side][push.bit_length() - 1] & empty
+            if self.ep_square is not None and side == self.side:
+                enemy |= 1 << self.ep_square
+            return push, chessTables.PAWN_ATTACKS[side][square] & enemy
+        attacks = PIECE_ATTACKS[kind](square, occupied)
+        quiet = attacks & empty
+        if kind == KING and self.castling & CASTLING_SIDES[side]:
+            quiet |= self.castling_targets(side, occupied)
+        return quiet, attacks & enemy
+
+    def castling_targets(self, side, occupied):
+        """Returns the king targets of the castling moves available to `side`
+
+        The king may not castle out of, through or into check.
+        """
+        base = 56 * side
+        rights = self.castling >> (2 * side)
+        targets = 0
+        if rights & WHITE_QUEENSIDE and not occupied & (0b1110 << base):
+            targets |= 1 << (base + 2)
+        if rights & WHITE_KINGSIDE and not occupied & (0b1100000 << base):
+            targets |= 1 << (base + 6)
+        if targets:
+            enemy = side ^ 1
+            if self.is_attacked(base + 4, enemy, occupied):
+                return 0
+            if targets & 1 << (base + 2) and (self.is_attacked(base + 3, enemy, occupied)
+                                             or self.is_attacked(base + 2, enemy, occupied)):
+                targets ^= 1 << (base + 2)
+            if targets & 1 << (base + 6) and (self.is_attacked(base + 5, enemy, occupied)
+                                             or self.is_attacked(base + 6, enemy, occupied)):
+                targets ^= 1 << (base + 6)
+        return targets
+
+    def is_attacked(self, square, by_side, occupied=None):
+        """Checks whether any piece of `by_side` attacks `square`
+
+        Args:
+            square (int): bit index of the square
+            by_side (int): WHITE or BLACK
+            occupied (int, optional): occupancy of the board, computed if not given;
+                without it the tracked attack maps answer if there are any
+        """
+        if occupied is None:
+            if self.attacked_by is not None:
+                return bool(self.attacked_by[by_side] >> square & 1)
+            occupied = self.occupied_by[WHITE] | self.occupied_by[BLACK]
+        pieces = self.bitboards[by_side]
+        if chessTables.PAWN_ATTACKS[by_side ^ 1][square] & pieces[PAWN] \
+                or chessTables.KNIGHT_ATTACKS[square] & pieces[KNIGHT] \
+                or chessTables.KING_ATTACKS[square] & pieces[KING]:
+            return True
+        return bool(chessMagic.rook_attacks(square, occupied) & (pieces[ROOK] | pieces[QUEEN])
+                    or chessMagic.bishop_attacks(square, occupied) & (pieces[BISHOP] | pieces[QUEEN]))
+
+    def captured_value(self, move):
+        """Material `move` wins at once in centipawns: the captured piece plus what a promotion adds"""
+        to_square = move >> 6 & 63
+        victim = self.mailbox[to_square]
+        value = MATERIAL[victim.kind] if victim is not None else MATERIAL[PAWN] if move >> 14 & 1 else 0
+        if move >> 15:
+            value += MATERIAL[(move >> 12 & 3) + KNIGHT] - MATERIAL[PAWN]
+        return value
+
+    def see(self, move):
+        """Static exchange evaluation: material won by `move` in centipawns when both sides keep recapturing
+        on its target square with their least valuable attacker, each free to stop when it only loses
+
+        Pieces uncovered behind a capturing slider or pawn join in; pins and checks are ignored.
+        """
+        from_square, to_square = move & 63, move >> 6 & 63
+        mailbox, bitboards = self.mailbox, self.bitboards
+        occupied = (self.occupied_by[WHITE] | self.occupied_by[BLACK]) ^ 1 << from_square
+        if move >> 12 == EP_CAPTURE:
+            occupied ^= 1 << (to_square - 8 if self.side == WHITE else to_square + 8)
+        gains = [self.captured_value(move)]
+        attacker_kind = move_promotion(move) or mailbox[from_square].kind
+        diagonal = bitboards[WHITE][BISHOP] | bitboards[WHITE][QUEEN] | bitboards[BLACK][BISHOP] | bitboards[BLACK][QUEEN]
+        straight = bitboards[WHITE][ROOK] | bitboards[WHITE][QUEEN] | bitboards[BLACK][ROOK] | bitboards[BLACK][QUEEN]
+        attackers = (self.attackers(to_square, WHITE, occupied) | self.attackers(to_square, BLACK, occupied)) & occupied
+        side = self.side ^ 1
+        while True:
+            own = attackers & self.occupied_by[side]
+            if not own:
+                break
+            for kind in range(6):
+                pieces = own & bitboards[side][kind]
+                if pieces:
+                    break
+            if kind == KING and attackers & self.occupied_by[side ^ 1]:
+                break  # the king may not take into a recapture
+            # the piece standing on the square is taken, the gain is from the capturing side
+            gains.append(MATERIAL[attacker_kind] - gains[-1])
+            attacker_kind = kind
+            occupied ^= pieces & -pieces
+            if kind in (PAWN, BISHOP, QUEEN):
+                attackers |= chessMagic.bishop_attacks(to_square, occupied) & diagonal
+            if kind in (ROOK, QUEEN):
+                attackers |= chessMagic.rook_attacks(to_square, occupied) & straight
+            attackers &= occupied
+            side ^= 1
+        for i in range(len(gains) - 1, 0, -1):
+            gains[i - 1] = -max(-gains[i - 1], gains[i])
+        return gains[0]
+
+    def square_attacks(self, square, occupied=None):
+        """Returns the squares attacked by the piece on `square` (0 for an empty square)"""
+        piece = self.mailbox[square]
+        if piece is None:
+            return 0
+        if piece.kind == PAWN:
+            return chessTables.PAWN_ATTACKS[piece.side][square]
+        if occupied is None:
+            occupied = self.occupied_by[WHITE] | self.occupied_by[BLACK]
+        return PIECE_ATTACKS[piece.kind](square, occupied)
+
+    def compute_attack_map(self, side):
+        """Computes the squares attacked by any piece of `side` from scratch"""
+        occupied = self.occupied_by[WHITE] | self.occupied_by[BLACK]
+        attacks = 0
+        for square in iter_bits(self.occupied_by[side]):
+            attacks |= self.square_attacks(square, occupied)
+        return attacks
+
+    def attack_map(self, side):
+        """Returns the squares attacked by `side`, from the tracked maps if there are any"""
+        if self.attacked_by is not None:
+            return self.attacked_by[side]
+        return self.compute_attack_map(side)
+
+    def track_attacks(self, enabled=True):
+        """Starts (or stops) keeping attacks_from and attacked_by up to date across make_move/unmake_move
+
+        Costs some time on every move, pays off when a position is asked about attacks many times.
+        """
+        self.attack_stack = []
+        if not enabled:
+            self.attacks_from = self.attacked_by = None
+            return
+        occupied = self.occupied_by[WHITE] | self.occupied_by[BLACK]
+        self.attacks_from = [self.square_attacks(square, occupied) for square in range(64)]
+        self.attacked_by = [self.compute_attack_map(WHITE), self.compute_attack_map(BLACK)]
+
+    def _update_attacks(self, changed):
+        """Recomputes the attacks of the pieces on `changed` squares and of the sliders looking at them
+
+        The previous maps are pushed to attack_stack, so unmake_move only has to pop them.
+        """
+        attacks_from = self.attacks_from
+        self.attack_stack.append((attacks_from, self.attacked_by))
+        attacks_from = attacks_from[:]
+        white, black = self.bitboards
+        occupied_by = self.occupied_by
+        occupied = occupied_by[WHITE] | occupied_by[BLACK]
+        sliders = white[BISHOP] | white[ROOK] | white[QUEEN] | black[BISHOP] | black[ROOK] | black[QUEEN]
+        for square in iter_bits(changed | sliders):
+            if changed >> square & 1 or attacks_from[square] & changed:
+                attacks_from[square] = self.square_attacks(square, occupied)
+        attacked_by = [0, 0]
+        for side in (WHITE, BLACK):
+            attacks = 0
+            for square in iter_bits(occupied_by[side]):
+                attacks |= attacks_from[square]
+            attacked_by[side] = attacks
+        self.attacks_from = attacks_from
+        self.attacked_by = attacked_by
+
+    def in_check(self, side=None):
+        """Checks whether the king of `side` (the side to move by default) is attacked"""
+        if side is None:
+            side = self.side
+        king = self.king_square[side]
+        return king is not None and self.is_attacked(king, side ^ 1)
+
+    def has_legal_move(self):
+        """Checks whether the side to move has a move that does not leave its king attacked"""
+        return len(self.legal_moves()) > 0
+
+    def insufficient_material(self):
+        """Neither side can mate: bare kings, a single minor piece, or bishops all on one colour"""
+        white, black = self.bitboards
+        if white[PAWN] | black[PAWN] | white[ROOK] | black[ROOK] | white[QUEEN] | black[QUEEN]:
+            return False
+        knights = white[KNIGHT] | black[KNIGHT]
+        bishops = white[BISHOP] | black[BISHOP]
+        if (knights | bishops).bit_count() <= 1:
+            return True
+        return not knights and (not bishops & LIGHT_SQUARES or not bishops & ~LIGHT_SQUARES)
+
+    def game_status(self):
+        """Returns the state of the game as one of ONGOING, CHECK, CHECKMATE, STALEMATE,
+        KING_CAPTURED, FIFTY_MOVE_DRAW or INSUFFICIENT_MATERIAL
+
+        Mate and stalemate refer to the side to move; after KING_CAPTURED the side whose
+        king_square is None has lost.
+        """
+        if self.king_square[WHITE] is None or self.king_square[BLACK] is None:
+            return KING_CAPTURED
+        check = self.in_check()
+        if not self.has_legal_move():
+            return CHECKMATE if check else STALEMATE
+        if self.halfmove_clock >= 100:
+            return FIFTY_MOVE_DRAW
+        if self.insufficient_material():
+            return INSUFFICIENT_MATERIAL
+        return CHECK if check else ONGOING
+
     def all_moves(self):
-        capture_arr = []
-        non_capture_arr = []
-        array = []
-        piece_array = self.get_piece_arr()
-        for piece in self.pieces:
-            moves = piece.correct_moves(piece_array)
-            captures = piece.correct_captures(piece_array)
-            for move in captures:
-                if self.active_color == Color.WHITE and piece.color == Color.WHITE:
-                    capture_arr.append([[piece.position.row,piece.position.col], [move.row,move.col]])
-                if self.active_color == Color.BLACK and piece.color == Color.BLACK:
-                    capture_arr.append([[piece.position.row,piece.position.col], [move.row,move.col]])
-            for move in moves:
-                if self.active_color == Color.WHITE and piece.color == Color.WHITE:
-                    non_capture_arr.append([[piece.position.row,piece.position.col], [move.row,move.col]])
-                if self.active_color == Color.BLACK and piece.color == Color.BLACK:
-                    non_capture_arr.append([[piece.position.row,piece.position.col], [move.row,move.col]])
-        array = capture_arr+non_capture_arr
-        return array
+        """Returns the pseudo-legal moves of the side to move, captures first
+
+        Returns:
+            array: packed moves, array('H')
+        """
+        capture_arr = array("H")
+        non_capture_arr = array("H")
+        side = self.side
+        enemy = self.occupied_by[side ^ 1]
+        occupied = enemy | self.occupied_by[side]
+        for kind in range(6):
+            for square in iter_bits(self.bitboards[side][kind]):
+                quiet, captures = self.piece_targets(side, kind, square, occupied, enemy)
+                self._add_moves(capture_arr, non_capture_arr, kind, square, quiet, captures)
+        return capture_arr + non_capture_arr
 
     def all_captures(self):
-        capture_arr = []
-        piece_array = self.get_piece_arr()
-        for piece in self.pieces:
-            captures = piece.correct_captures(piece_array, None)
-            for move in captures:
-                if self.active_color == Color.WHITE and piece.color == Color.WHITE:
-                    capture_arr.append([[piece.position.row, piece.position.col], [move.row, move.col]])
-                if self.active_color == Color.BLACK and piece.color == Color.BLACK:
-                    capture_arr.append([[piece.position.row, piece.position.col], [move.row, move.col]])
+        """Returns the pseudo-legal captures of the side to move as array('H')"""
+        capture_arr = array("H")
+        side = self.side
+        enemy = self.occupied_by[side ^ 1]
+        occupied = enemy | self.occupied_by[side]
+        for kind in range(6):
+            for square in iter_bits(self.bitboards[side][kind]):
+                _, captures = self.piece_targets(side, kind, square, occupied, enemy)
+                self._add_moves(capture_arr, None, kind, square, 0, captures)
         return capture_arr
 
+    def _add_moves(self, capture_arr, non_capture_arr, kind, square, quiet, captures):
+        """Packs the target bitboards of the piece of `kind` on `square` into the move arrays"""
+        if kind == PAWN:
+            for target in iter_bits(captures):
+                move = square | target << 6
+                if target == self.ep_square:
+                    capture_arr.append(move | EP_CAPTURE << 12)
+                elif target >= 56 or target < 8:
+                    for flag in PROMOTION_FLAGS:
+                        capture_arr.append(move | (flag | CAPTURE) << 12)
+                else:
+                    capture_arr.append(move | CAPTURE << 12)
+            for target in iter_bits(quiet):
+                move = square | target << 6
+                if target >= 56 or target < 8:
+                    for flag in PROMOTION_FLAGS:
+                        non_capture_arr.append(move | flag << 12)
+                elif target - square == 16 or square - target == 16:
+                    non_capture_arr.append(move | DOUBLE_PAWN_PUSH << 12)
+                else:
+                    non_capture_arr.append(move)
+            return
+        for target in iter_bits(captures):
+            capture_arr.append(square | target << 6 | CAPTURE << 12)
+        for target in iter_bits(quiet):
+            if kind == KING and (target - square == 2 or square - target == 2):
+                non_capture_arr.append(square | target << 6 | (KING_CASTLE if target > square else QUEEN_CASTLE) << 12)
+            else:
+                non_capture_arr.append(square | target << 6)
 
-    def interesting_moves(self):
-        capture_arr = []
-        piece_array = self.get_piece_arr()
-        for piece in self.pieces:
-            captures = piece.correct_captures(piece_array, None)
-            for move in captures:
-                if self.active_color == Color.WHITE and piece.color == Color.WHITE:
-                    capture_arr.append([[piece.position.row, piece.position.col], [move.row, move.col]])
-                if self.active_color == Color.BLACK and piece.color == Color.BLACK:
-                    capture_arr.append([[piece.position.row, piece.position.col], [move.row, move.col]])
+    def legal_moves(self):
+        """Returns the legal moves of the side to move, captures first
+
+        Checkers and pinned pieces are worked out once, so no move has to be tried on the board
+        except en passant captures.
+
+        Returns:
+            array: packed moves, array('H')
+        """
+        context = self._legal_context()
+        capture_arr = array("H")
+        non_capture_arr = array("H")
+        side = self.side
+        enemy = self.occupied_by[side ^ 1]
+        occupied = enemy | self.occupied_by[side]
+        for kind in range(6):
+            for square in iter_bits(self.bitboards[side][kind]):
+                quiet, captures = self._legal_targets(kind, square, context, occupied, enemy)
+                self._add_moves(capture_arr, non_capture_arr, kind, square, quiet, captures)
+        return capture_arr + non_capture_arr
+
+    def legal_captures(self, context=None, promotions=False):
+        """Returns the legal captures of the side to move as array('H'), with `promotions` the quiet promotions too"""
+        if context is None:
+            context = self._legal_context()
+        capture_arr = array("H")
+        side = self.side
+        enemy = self.occupied_by[side ^ 1]
+        occupied = enemy | self.occupied_by[side]
+        promotion_rank = PROMOTION_RANKS[side] if promotions else 0
+        for kind in range(6):
+            for square in iter_bits(self.bitboards[side][kind]):
+                quiet, captures = self._legal_targets(kind, square, context, occupied, enemy)
+                if kind == PAWN:
+                    quiet &= promotion_rank
+                    self._add_moves(capture_arr, capture_arr, kind, square, quiet, captures)
+                else:
+                    self._add_moves(capture_arr, None, kind, square, 0, captures)
         return capture_arr
 
+    def legal_targets(self, position):
+        """Returns where the piece on `position` may legally go, as two lists of Position: (moves, captures)"""
+        piece = self.mailbox[position.square]
+        if piece is None or piece.side != self.side:
+            return [], []
+        enemy = self.occupied_by[self.side ^ 1]
+        occupied = enemy | self.occupied_by[self.side]
+        quiet, captures = self._legal_targets(piece.kind, position.square, self._legal_context(), occupied, enemy)
+        return [SQUARES[target] for target in iter_bits(quiet)], [SQUARES[target] for target in iter_bits(captures)]
+
+    def attackers(self, square, by_side, occupied=None):
+        """Returns the bitboard of the pieces of `by_side` attacking `square`"""
+        if occupied is None:
+            occupied = self.occupied_by[WHITE] | self.occupied_by[BLACK]
+        pieces = self.bitboards[by_side]
+        return (chessTables.PAWN_ATTACKS[by_side ^ 1][square] & pieces[PAWN]
+                | chessTables.KNIGHT_ATTACKS[square] & pieces[KNIGHT]
+                | chessTables.KING_ATTACKS[square] & pieces[KING]
+                | chessMagic.rook_attacks(square, occupied) & (pieces[ROOK] | pieces[QUEEN])
+                | chessMagic.bishop_attacks(square, occupied) & (pieces[BISHOP] | pieces[QUEEN]))
+
+    def _legal_context(self):
+        """Works out what restricts the moves of the side to move
+
+        Returns:
+            tuple: (squares a piece other than the king must move to, bitboard of pinned pieces,
+                    {pinned square: line it may move along})
+        """
+        side = self.side
+        king = self.king_square[side]
+        if king is None:
+            return FULL, 0, {}
+        own, enemy = self.occupied_by[side], self.occupied_by[side ^ 1]
+        checkers = self.attackers(king, side ^ 1, own | enemy)
+        if not checkers:
+            check_mask = FULL
+        elif checkers & (checkers - 1):
+            check_mask = 0  # double check, only the king can move
+        else:
+            check_mask = checkers | chessTables.BETWEEN[king][checkers.bit_length() - 1]
+        # enemy sliders that would see the king through exactly one of our pieces
+        their = self.bitboards[side ^ 1]
+        snipers = (chessMagic.rook_attacks(king, enemy) & (their[ROOK] | their[QUEEN])
+                   | chessMagic.bishop_attacks(king, enemy) & (their[BISHOP] | their[QUEEN]))
+        pinned = 0
+        pin_lines = {}
+        for sniper in iter_bits(snipers):
+            blockers = chessTables.BETWEEN[king][sniper] & own
+            if blockers and not blockers & (blockers - 1):
+                pinned |= blockers
+                pin_lines[blockers.bit_length() - 1] = chessTables.LINE[king][sniper]
+        return check_mask, pinned, pin_lines
 
+    def _legal_targets(self, kind, square, context, occupied, enemy):
+        """piece_targets of the side to move, cut down to the legal ones using _legal_context"""
+        side = self.side
+        quiet, captures = self.piece_targets(side, kind, square, occupied, enemy)
+        if kind == KING:
+            without_king = occupied ^ (1 << square)  # the king does not shield squares behind it
+            for target in iter_bits(quiet | captures):
+                if self.is_attacked(target, side ^ 1, without_king):
+                    quiet &= ~(1 << target)
+                    captures &= ~(1 << target)
+            return quiet, captures
+        check_mask, pinned, pin_lines = context
+        mask = check_mask
+        if pinned >> square & 1:
+            mask &= pin_lines[square]
+        ep_square = self.ep_square
+        if kind == PAWN and ep_square is not None and captures >> ep_square & 1:
+            # two pawns leave the rank at once, so just try it
+            self.make_move(pack_move(square, ep_square, EP_CAPTURE))
+            legal = not self.in_check(side)
+            self.unmake_move()
+            return quiet & mask, captures & mask & ~(1 << ep_square) | legal << ep_square
+        return quiet & mask, captures & mask
+
+    def is_legal(self, move):
+        """Checks that `move` can be played here without leaving the own king attacked"""
+        if not self.is_pseudo_legal(move):
+            return False
+        side = self.side
+        self.make_move(move)
+        legal = not self.in_check(side)
+        self.unmake_move()
+        return legal
+
+    def staged_moves(self, hash_move=NULL_MOVE, killers=(), history=None):
+        """Yields the legal moves of the side to move stage by stage, generating a stage only when it is reached
+
+        1. `hash_move`, if it can be played here
+        2. captures, most valuable victim first, then least valuable attacker
+        3. `killers` that are quiet moves in this position
+        4. the remaining quiet moves, best `history` score first if a table is given
+
+        The board may be changed between two moves as long as it is restored before the next one.
+
+        Args:
+            history (sequence, optional): score of every quiet move of the side to move,
+                indexed by from + 64 * to (move & 4095)
+        """
+        tried = []
+        if hash_move and self.is_legal(hash_move):
+            tried.append(hash_move)
+            yield hash_move
+        context = self._legal_context()
+        for move in self.ordered_captures(context):
+            if move != hash_move:
+                yield move
+        for killer in killers:
+            if killer and not killer >> 14 & 1 and killer not in tried and self.is_legal(killer):
+                tried.append(killer)
+                yield killer
+        side = self.side
+        enemy = self.occupied_by[side ^ 1]
+        occupied = enemy | self.occupied_by[side]
+        moves = array("H")
+        if history is not None:  # all quiet moves are needed to sort them
+            for kind in range(6):
+                for square in iter_bits(self.bitboards[side][kind]):
+                    quiet, _ = self._legal_targets(kind, square, context, occupied, enemy)
+                    self._add_moves(None, moves, kind, square, quiet, 0)
+            for move in sorted(moves, key=lambda move: -history[move & 4095]):
+                if move not in tried:
+                    yield move
+            return
+        for kind in range(6):
+            for square in iter_bits(self.bitboards[side][kind]):
+                quiet, _ = self._legal_targets(kind, square, context, occupied, enemy)
+                del moves[:]
+                self._add_moves(None, moves, kind, square, quiet, 0)
+                for move in moves:
+                    if move not in tried:
+                        yield move
+
+    def ordered_captures(self, context=None, promotions=False):
+        """Returns the legal captures of the side to move in MVV-LVA order, see legal_captures
+
+        A promotion counts as taking the piece it promotes to, unless it takes something more valuable.
+        """
+        mailbox = self.mailbox
+        scored = []
+        for move in self.legal_captures(context, promotions):
+            victim = mailbox[move >> 6 & 63]
+            victim_kind = PAWN if victim is None else victim.kind  # en passant or a quiet promotion
+            if move >> 15:
+                victim_kind = max(victim_kind, (move >> 12 & 3) + KNIGHT)
+            scored.append((victim_kind * 8 - mailbox[move & 63].kind, move))
+        scored.sort(key=lambda item: -item[0])
+        return array("H", [move for _, move in scored])
+
+    def is_pseudo_legal(self, move):
+        """Checks that `move` can be generated in this position, e.g. a stored best move after a hash collision"""
+        from_square, to_square = move & 63, move >> 6 & 63
+        piece = self.mailbox[from_square]
+        if piece is None or piece.side != self.side:
+            return False
+        quiet, captures = self.piece_targets(self.side, piece.kind, from_square)
+        if not (quiet | captures) >> to_square & 1:
+            return False
+        return self.move_code(from_square, to_square, move_promotion(move) or QUEEN) == move
+
+    def interesting_moves(self):
+        return self.all_captures()
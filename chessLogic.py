@@ -1,20 +1,690 @@
 import chessEngine
 import copy
-import bpt
-BLACK = chessEngine.Color.BLACK
-WHITE = chessEngine.Color.WHITE
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from array import array
+from multiprocessing import shared_memory
+BLACK = chessEngine.BLACK
+WHITE = chessEngine.WHITE
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = (chessEngine.PAWN, chessEngine.KNIGHT, chessEngine.BISHOP, chessEngine.ROOK,
+                                            chessEngine.QUEEN, chessEngine.KING)
+
+EXACT, LOWER_BOUND, UPPER_BOUND = 1, 2, 3  # 0 marks an empty slot
+MATE_SCORE = 10 ** 6  # minus the plies from the root to the mate, so a quicker mate scores higher
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results keyed by the Zobrist key of the board
+
+    Every bucket has two slots: the first keeps the deepest result (or any newer than the
+    current search), the second always takes what the first refused. Keys and packed entries
+    live in two preallocated array('Q'), so the memory used never grows.
+
+    A shared table lives in a multiprocessing.shared_memory block instead, written by several
+    processes without a lock. Every slot stores key ^ entry in place of the key, so an entry
+    torn by two processes writing the same slot at once no longer matches its key and is ignored.
+
+    entry: move (16 bits) | depth + 128 (8) | bound (2) | generation (6) | score + 2 ** 31 (32)
+    """
+
+    def __init__(self, size_mb=16, shared=None):
+        """
+        Args:
+            size_mb (int): memory of the table, rounded down to a power of two buckets
+            shared (bool or str, optional): True creates the table in a new shared memory block,
+                the name of a block attaches to the table another process created with the same size_mb
+        """
+        buckets = 1
+        while 2 * buckets * 2 * 2 * 8 <= size_mb * 1024 * 1024:  # two keys and two entries of 8 bytes a bucket
+            buckets *= 2
+        self.mask = buckets - 1
+        self.shared_memory = None
+        if shared:
+            size = 8 * 2 * 2 * buckets
+            if shared is True:
+                self.shared_memory = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                self.shared_memory = shared_memory.SharedMemory(name=shared)
+            self._view = self.shared_memory.buf[:size].cast("Q")
+            self.keys, self.entries = self._view[:2 * buckets], self._view[2 * buckets:]
+        else:
+            self.keys = array("Q", bytes(8 * 2 * buckets))
+            self.entries = array("Q", bytes(8 * 2 * buckets))
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def name(self):
+        """Name of the shared memory block to attach to, None for a private table"""
+        return None if self.shared_memory is None else self.shared_memory.name
+
+    def close(self):
+        """Detaches from the shared memory block, the table can not be used afterwards"""
+        if self.shared_memory is not None:
+            self.keys.release()
+            self.entries.release()
+            self._view.release()
+            self.shared_memory.close()
+
+    def unlink(self):
+        """Closes the table and frees the shared memory block, by the process that created it"""
+        if self.shared_memory is not None:
+            self.close()
+            self.shared_memory.unlink()
+
+    def clear(self):
+        size = len(self.keys)
+        self.keys[:] = array("Q", bytes(8 * size))
+        self.entries[:] = array("Q", bytes(8 * size))
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = self.hits = self.cutoffs = self.stores = self.overwrites = 0
+
+    def new_search(self):
+        """Ages the stored entries, so the depth-preferred slots of older searches get replaced"""
+        self.generation = (self.generation + 1) & 63
+
+    def probe(self, key, ply=0):
+        """Looks a position up
+
+        Args:
+            key (int): Zobrist key of the position
+            ply (int): distance of the position from the root, mate scores are stored relative to it
+
+        Returns:
+            tuple: (depth, bound, score, packed move), or None if the position is not stored
+        """
+        self.probes += 1
+        index = (key & self.mask) << 1
+        keys, entries = self.keys, self.entries
+        entry = entries[index]
+        if keys[index] ^ entry != key:
+            index += 1
+            entry = entries[index]
+            if keys[index] ^ entry != key:
+                return None
+        if not entry >> 24 & 3:
+            return None
+        self.hits += 1
+        score = (entry >> 32) - 2 ** 31
+        if score >= MATE_BOUND:
+            score -= ply
+        elif score <= -MATE_BOUND:
+            score += ply
+        return (entry >> 16 & 255) - 128, entry >> 24 & 3, score, entry & 0xFFFF
+
+    def store(self, key, depth, bound, score, move=0, ply=0):
+        """Saves a search result
+
+        Args:
+            key (int): Zobrist key of the position
+            depth (int): remaining depth the score was searched to, -128..127
+            bound (int): EXACT, LOWER_BOUND or UPPER_BOUND
+            score (int): score from the point of view of the side to move
+            move (int): best move, chessEngine.NULL_MOVE if there is none
+            ply (int): distance of the position from the root; a mate is stored as the distance from
+                the position, so the entry holds wherever the position is reached again
+        """
+        index = (key & self.mask) << 1
+        keys, entries = self.keys, self.entries
+        old = entries[index]
+        if keys[index] ^ old != key and old >> 24 & 3 and (old >> 26 & 63) == self.generation \
+                and (old >> 16 & 255) - 128 > depth:
+            index += 1  # the first slot holds a deeper result of this search
+            old = entries[index]
+        if keys[index] ^ old == key:
+            if not move:
+                move = old & 0xFFFF  # keep the best move of a shallower search of the same position
+        elif old >> 24 & 3:
+            self.overwrites += 1
+        self.stores += 1
+        if score >= MATE_BOUND:
+            score += ply
+        elif score <= -MATE_BOUND:
+            score -= ply
+        score = max(-2 ** 31, min(2 ** 31 - 1, int(score)))
+        entry = move | (depth + 128) << 16 | bound << 24 | self.generation << 26 | (score + 2 ** 31) << 32
+        entries[index] = entry
+        keys[index] = key ^ entry
+
+    def stats(self):
+        """Probe, hit and store counters since the last reset"""
+        used = sum(1 for entry in self.entries if entry)
+        return {"probes": self.probes, "hits": self.hits, "cutoffs": self.cutoffs, "stores": self.stores,
+                "overwrites": self.overwrites, "hit_rate": self.hit_rate, "fill": used / len(self.entries)}
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+
+class SearchAborted(Exception):
+    def __init__(self, message=""):
+        self.message = message
+
+    def __str__(self):
+        if self.message:
+            return "SearchAborted: " + self.message
+        else:
+            return "SearchAborted"
+
+
+class SearchLimits:
+    """
+    Time and node budget of one iterative deepening search
+
+    deadline: time.perf_counter() at which the running iteration is abandoned
+    soft_deadline: no new iteration is started after it, the next one would hardly finish
+    max_nodes: hard limit on the nodes of the whole search, counted from start_nodes of SearchContext.nodes
+    """
+    CHECK_MASK = 63  # the clock and the stop token are read every 64 nodes, a few milliseconds
+
+    def __init__(self, budget=None, max_nodes=None, start_nodes=0):
+        self.start = time.perf_counter()
+        self.start_nodes = start_nodes
+        self.deadline = None if budget is None else self.start + budget
+        self.soft_deadline = None if budget is None else self.start + budget / 2
+        self.max_nodes = max_nodes
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def check(self, nodes):
+        """Raises SearchAborted once the budget is spent, `nodes` is the SearchContext.nodes count"""
+        if self.max_nodes is not None and nodes - self.start_nodes >= self.max_nodes:
+            raise SearchAborted(f"node limit {self.max_nodes}")
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted(f"time limit {self.deadline - self.start:.2f}s")
+
+    def may_start_iteration(self):
+        return self.soft_deadline is None or time.perf_counter() < self.soft_deadline
+
+
+MAX_PLY = 128
+MATE_BOUND = MATE_SCORE - MAX_PLY  # every score at least this far from 0 is a mate
+HISTORY_MAX = 1 << 20  # the history table is halved when a score reaches it
+ASPIRATION_WINDOW = 100  # half width of the first root window around the previous iteration's score
+NULL_MOVE_REDUCTION = 2
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVES = 3  # moves searched at full depth before quiet ones get reduced
+FUTILITY_MARGINS = (0, 200, 350)  # by remaining depth
+RAZOR_MARGINS = (0, 300, 500)
+DELTA_MARGIN = 200  # positional swing a capture in the quiescence search may bring on top of its material
+QUIESCENCE_MAX_DEPTH = MAX_PLY // 4  # plies below the horizon where the quiescence search stands pat regardless
+
+
+class SearchOptions:
+    """
+    Switches for the selective parts of the search, so each can be measured on its own
+
+    null_move: give the opponent a free move at reduced depth, cut if we still stay above beta
+    late_move_reductions: search late quiet moves one or two plies shallower first
+    futility: skip quiet moves at depth 1 and 2 when the static evaluation is far below alpha
+    razoring: drop into the quiescence search at depth 1 and 2 when far below alpha
+    mate_distance: narrow the window to the mate scores still reachable from the node
+    """
+
+    def __init__(self, null_move=True, late_move_reductions=True, futility=True, razoring=True,
+                 mate_distance=True):
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        self.futility = futility
+        self.razoring = razoring
+        self.mate_distance = mate_distance
+
+    @classmethod
+    def none(cls):
+        """Full width search, every selective feature off"""
+        return cls(False, False, False, False, False)
+
+    def __repr__(self):
+        return "SearchOptions(" + ", ".join(f"{name}={value}" for name, value in vars(self).items()) + ")"
+
+
+class PVTable:
+    """
+    Triangular principal variation table
+
+    Row `ply` holds the best line found from the node at `ply`, in moves[ply * size + ply:ply * size + length[ply]].
+    A node puts its best move in front of its child's row, so row 0 ends up with the line of the search.
+    Both arrays are allocated once.
+    """
+
+    def __init__(self, size=MAX_PLY):
+        self.size = size
+        self.moves = array("H", bytes(2 * size * size))
+        self.length = array("H", bytes(2 * (size + 1)))
+
+    def clear_ply(self, ply):
+        self.length[ply] = ply
+
+    def update(self, ply, move):
+        """`move` followed by the line of the child at ply + 1 becomes the line of `ply`"""
+        moves, size = self.moves, self.size
+        row, child = ply * size, (ply + 1) * size
+        length = self.length[ply + 1]
+        moves[row + ply] = move
+        moves[row + ply + 1:row + length] = moves[child + ply + 1:child + length]
+        self.length[ply] = length
+
+    def line(self, ply=0):
+        start = ply * self.size
+        return list(self.moves[start + ply:start + self.length[ply]])
+
+    def __getitem__(self, ply):
+        return self.line(ply)
+
+
+def evaluate(board):
+    """Static evaluation in centipawns from white's side, see Node.get_static_evaluation"""
+    return chessEngine.taper(board.middlegame, board.endgame, board.phase)
+
+
+class SearchContext:
+    """
+    Everything a search keeps between its nodes, how well it works, and the search itself
+
+    The search runs on a single board and allocates nothing per node besides its move generator;
+    everything it keeps between nodes is indexed by ply and allocated once. Nothing is kept in the
+    module, so searches with their own contexts can run in parallel threads. A context may be reused
+    for the next move of the same game, its tables then start out filled.
+
+    t_table: TranspositionTable
+    nodes: nodes searched by this context so far
+    limits: SearchLimits of the running iterative deepening search, None otherwise
+    stop_token: threading.Event, or anything else with is_set(), of the running search; once it is set
+        the search raises SearchAborted at the next limits check
+    deepest_quiescence: lowest quiescence depth reached (0, -1, ...)
+    killers: per ply the last two quiet moves that caused a beta cutoff there
+    history: butterfly table per side, indexed by from + 64 * to; a quiet move gains depth ** 2
+        when it causes a cutoff, the quiet moves searched before it lose as much
+    pv: PVTable, pv[ply] is the best line found from the node at `ply`, so pv[0] is the best line of the search
+    quiets: per ply scratch list of the quiet moves searched so far, for the history update
+    options: SearchOptions in effect
+    """
+
+    def __init__(self, options=None, t_table=None):
+        self.options = SearchOptions() if options is None else options
+        self.t_table = TranspositionTable() if t_table is None else t_table
+        self.nodes = 0
+        self.limits = None
+        self.stop_token = None
+        self.deepest_quiescence = 0
+        self.killers = [[chessEngine.NULL_MOVE, chessEngine.NULL_MOVE] for _ in range(MAX_PLY)]
+        self.history = (array("i", bytes(4 * 4096)), array("i", bytes(4 * 4096)))
+        self.pv = PVTable()
+        self.quiets = [array("H") for _ in range(MAX_PLY)]
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.start_nodes = self.nodes
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.hash_move_cutoffs = 0
+        self.capture_cutoffs = 0
+        self.killer_cutoffs = 0
+        self.quiet_cutoffs = 0
+        self.pvs_researches = 0
+        self.aspiration_researches = 0
+        self.null_move_cutoffs = 0
+        self.reductions = 0
+        self.lmr_researches = 0
+        self.futility_prunes = 0
+        self.razor_cutoffs = 0
+        self.mate_distance_cutoffs = 0
+        self.delta_prunes = 0
+        self.see_prunes = 0
+
+    def new_search(self, stop=None):
+        """Forgets the killers and ages the history and the table, so the last search only hints at the new one
+
+        Args:
+            stop (threading.Event, optional): stop token of the new search, a new one if not given
+        """
+        self.t_table.new_search()
+        self.stop_token = threading.Event() if stop is None else stop
+        for ply_killers in self.killers:
+            ply_killers[0] = ply_killers[1] = chessEngine.NULL_MOVE
+        for table in self.history:
+            for i in range(4096):
+                table[i] >>= 2
+        self.reset_stats()
+
+    def clear(self):
+        """Empties every table, as for a new game"""
+        self.t_table.clear()
+        self.__init__(self.options, self.t_table)
+
+    def stop(self):
+        """Sets the stop token of the running search, it ends within CHECK_MASK + 1 nodes"""
+        if self.stop_token is not None:
+            self.stop_token.set()
+
+    def check_limits(self):
+        if self.stop_token is not None and self.stop_token.is_set():
+            raise SearchAborted("stopped")
+        if self.limits is not None:
+            self.limits.check(self.nodes)
+
+    def beta_cutoff(self, ply, side, move, depth, move_number, hash_move, quiets_tried):
+        """Records that `move`, searched as `move_number` (0 for the first) at `ply`, refuted the position
+
+        Args:
+            quiets_tried (list): quiet moves searched before `move` at this node
+        """
+        self.cutoffs += 1
+        if move_number == 0:
+            self.first_move_cutoffs += 1
+        ply_killers = self.killers[ply]
+        if move == hash_move:
+            self.hash_move_cutoffs += 1
+        elif chessEngine.is_capture(move):
+            self.capture_cutoffs += 1
+        elif move in ply_killers:
+            self.killer_cutoffs += 1
+        else:
+            self.quiet_cutoffs += 1
+        if chessEngine.is_capture(move):
+            return
+        if move != ply_killers[0]:
+            ply_killers[1] = ply_killers[0]
+            ply_killers[0] = move
+        table = self.history[side]
+        bonus = depth * depth
+        for quiet in quiets_tried:
+            table[quiet & 4095] = max(table[quiet & 4095] - bonus, -HISTORY_MAX)
+        table[move & 4095] += bonus
+        if table[move & 4095] >= HISTORY_MAX:
+            for i in range(4096):
+                table[i] >>= 1
+
+    def search(self, board, depth, alpha, beta, ply=0, node=None):
+        """Principal variation search of `board` to `depth`, scored from the side to move
+
+        Args:
+            board (chessEngine.Board): position, restored when the search returns
+            depth (int): remaining depth, the quiescence search takes over at 0
+            alpha, beta (int): search window
+            ply (int): distance from the root, 0 is the root
+            node (Node, optional): if given, the searched tree is kept below it as Node children
+
+        Returns:
+            int: score, fail-soft
+        """
+        self.nodes += 1
+        if not self.nodes & SearchLimits.CHECK_MASK:
+            self.check_limits()
+        self.pv.clear_ply(ply)
+        sign = 1 if board.side == WHITE else -1
+
+        if board.king_square[WHITE] is None or board.king_square[BLACK] is None:
+            return sign * evaluate(board)
+        if depth <= 0:
+            return self.quiescence(board, 0, alpha, beta, sign * evaluate(board), ply, node)
+
+        key = board.key
+        t_table = self.t_table
+        entry = t_table.probe(key, ply)
+        tt_move = chessEngine.NULL_MOVE
+        is_root = ply == 0
+        if entry is not None:
+            t_depth, t_bound, t_score, tt_move = entry
+            # the root always searches, the caller reads its best move
+            if not is_root and t_depth >= depth and (t_bound == EXACT or (
+                    t_bound == LOWER_BOUND and t_score >= beta) or (t_bound == UPPER_BOUND and t_score <= alpha)):
+                t_table.cutoffs += 1
+                return t_score
+
+        options = self.options
+        pv_node = beta - alpha > 1
+        in_check = board.in_check()
+        if options.mate_distance and not is_root:
+            # nothing below can be mated sooner than here or mate sooner than the next ply
+            alpha = max(alpha, -MATE_SCORE + ply)
+            beta = min(beta, MATE_SCORE - ply - 1)
+            if alpha >= beta:
+                self.mate_distance_cutoffs += 1
+                return alpha
+        static_evaluation = sign * evaluate(board)
+        frontier = not (is_root or pv_node or in_check) and depth < len(FUTILITY_MARGINS)
+        if options.razoring and frontier and static_evaluation + RAZOR_MARGINS[depth] <= alpha:
+            if depth == 1:
+                self.razor_cutoffs += 1
+                return self.quiescence(board, 0, alpha, beta, static_evaluation, ply, node)
+            razor_value = self.quiescence(board, 0, alpha, alpha + 1, static_evaluation, ply, node)
+            if razor_value <= alpha:
+                self.razor_cutoffs += 1
+                return razor_value
+        if options.null_move and not (is_root or pv_node or in_check) and depth > NULL_MOVE_REDUCTION \
+                and static_evaluation >= beta and abs(beta) < MATE_BOUND \
+                and board.undo_stack and board.undo_stack[-1][0] != chessEngine.NULL_MOVE:
+            # zugzwang guard: with pawns and king only passing may be the best move, so never assume it is bad
+            pieces = board.bitboards[board.side]
+            if pieces[KNIGHT] | pieces[BISHOP] | pieces[ROOK] | pieces[QUEEN]:
+                board.make_null_move()
+                null_value = -self.search(board, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, ply + 1)
+                board.unmake_null_move()
+                if null_value >= beta:
+                    self.null_move_cutoffs += 1
+                    return beta if null_value >= MATE_BOUND else null_value  # an unproven mate is not reported
+        futile = options.futility and frontier and static_evaluation + FUTILITY_MARGINS[depth] <= alpha
+
+        if node is not None:
+            node.moves = array("H")
+            node.children = []
+        side = board.side
+        killers = self.killers[ply]
+        quiets = self.quiets[ply]
+        del quiets[:]
+        alpha_orig = alpha
+        best_move = chessEngine.NULL_MOVE
+        value = - 10 ** 9
+        searched = 0
+        pruned = False
+        for move in board.staged_moves(tt_move, killers, self.history[side]):
+            quiet = not move >> 14  # neither a capture nor a promotion
+            board.make_move(move)
+            gives_check = quiet and searched and board.in_check()
+            if futile and quiet and searched and not gives_check:
+                board.unmake_move()
+                self.futility_prunes += 1
+                pruned = True
+                value = max(value, static_evaluation + FUTILITY_MARGINS[depth])
+                continue
+            searched += 1
+            child = None
+            if node is not None:
+                node.moves.append(move)
+                child = Node(str(self.nodes), not node.is_white, self)
+                child.board = board
+                node.children.append(child)
+            if searched == 1:
+                score = -self.search(board, depth - 1, -beta, -alpha, ply + 1, child)
+            else:
+                reduction = 0
+                if options.late_move_reductions and quiet and not (in_check or gives_check) \
+                        and depth >= LMR_MIN_DEPTH and searched > LMR_MIN_MOVES and move not in killers:
+                    reduction = min(1 if searched <= 2 * LMR_MIN_MOVES else 2, depth - 2)
+                if reduction:
+                    self.reductions += 1
+                    score = -self.search(board, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1, child)
+                    if score > alpha:
+                        self.lmr_researches += 1
+                if not reduction or score > alpha:
+                    # principal variation search: prove the move is no better than the first one with a zero window
+                    score = -self.search(board, depth - 1, -alpha - 1, -alpha, ply + 1, child)
+                    if alpha < score < beta:
+                        self.pvs_researches += 1
+                        score = -self.search(board, depth - 1, -beta, -alpha, ply + 1, child)
+            if child is not None:
+                child.evaluation = -score
+            if score > value:
+                value = score
+                best_move = move
+            if value > alpha:
+                alpha = value
+                if value < beta:
+                    self.pv.update(ply, move)
+            board.unmake_move()
+            if alpha >= beta:
+                self.beta_cutoff(ply, side, move, depth, searched - 1, tt_move, quiets)
+                break
+            if quiet:
+                quiets.append(move)
+        if not searched and not pruned:
+            value = -(MATE_SCORE - ply) if in_check else 0
+
+        t_table.store(key, depth, UPPER_BOUND if value <= alpha_orig else LOWER_BOUND if value >= beta else EXACT,
+                      value, best_move, ply)
+        return value
+
+    def quiescence(self, board, depth, alpha, beta, stand_pat, ply=0, node=None):
+        """Quiescence search below the horizon, `depth` counts down from 0, see search for the rest
+
+        Only captures and queen promotions are searched, most valuable victim first, and the side to move
+        may stand pat instead. A capture is skipped when even winning its victim for free leaves the score
+        DELTA_MARGIN short of alpha, or when the static exchange on its square loses material.
+        In check every evasion is searched and there is no standing pat. Chains of checks and evasions
+        end at QUIESCENCE_MAX_DEPTH below the horizon or at MAX_PLY from the root, with stand_pat.
 
-counter = 0
-# t_table = dict()
-mmax = 0
+        Args:
+            stand_pat (int): static evaluation of `board` from the side to move
+            ply (int): distance from the root
+        """
+        if self.deepest_quiescence > depth:
+            self.deepest_quiescence = depth
+        self.nodes += 1
+        if not self.nodes & SearchLimits.CHECK_MASK:
+            self.check_limits()
+        sign = 1 if board.side == WHITE else -1
+
+        if board.king_square[WHITE] is None or board.king_square[BLACK] is None:
+            return sign * evaluate(board)
+        if depth <= -QUIESCENCE_MAX_DEPTH or ply >= MAX_PLY - 1:
+            return stand_pat
+
+        key = board.key
+        t_table = self.t_table
+        entry = t_table.probe(key, ply)
+        tt_move = chessEngine.NULL_MOVE
+        if entry is not None:
+            t_depth, t_bound, t_score, tt_move = entry
+            if t_depth >= depth and (t_bound == EXACT or (t_bound == LOWER_BOUND and t_score >= beta) or (
+                    t_bound == UPPER_BOUND and t_score <= alpha)):
+                t_table.cutoffs += 1
+                return t_score
+
+        in_check = board.in_check()
+        if in_check:
+            value = - 10 ** 9
+            moves = board.legal_moves()
+        else:
+            value = stand_pat
+            if value >= beta:
+                return value
+            moves = board.ordered_captures(promotions=True)
+        if node is not None:
+            node.moves = array("H")
+            node.children = []
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        alpha_orig = alpha
+        alpha = max(alpha, value)
+        best_move = chessEngine.NULL_MOVE
+        searched = 0
+        mailbox = board.mailbox
+        for move in moves:
+            if not in_check:
+                if move >> 15 and move >> 12 & 3 != QUEEN - KNIGHT:
+                    continue  # an under-promotion never gains more than the queen one
+                gain = board.captured_value(move)
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    self.delta_prunes += 1
+                    value = max(value, stand_pat + gain + DELTA_MARGIN)  # the most it could have scored
+                    continue
+                if chessEngine.MATERIAL[mailbox[move & 63].kind] > gain and board.see(move) < 0:
+                    self.see_prunes += 1
+                    continue
+            searched += 1
+            board.make_move(move)
+            child = None
+            if node is not None:
+                child = Node(str(self.nodes), not node.is_white, self)
+                child.board = board
+                node.children.append(child)
+                node.moves.append(move)
+            score = -self.quiescence(board, depth - 1, -beta, -alpha, -sign * evaluate(board), ply + 1, child)
+            if child is not None:
+                child.evaluation = -score
+            board.unmake_move()
+            if score > value:
+                value = score
+                best_move = move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        if in_check and not searched:
+            value = -(MATE_SCORE - ply)
+
+        t_table.store(key, depth, UPPER_BOUND if value <= alpha_orig else LOWER_BOUND if value >= beta else EXACT,
+                      value, best_move, ply)
+        return value
+
+    def stats(self):
+        """Nodes and beta cutoffs since the last reset, by the kind of move that caused them"""
+        return {"nodes": self.nodes - self.start_nodes, "cutoffs": self.cutoffs,
+                "first_move_cutoffs": self.first_move_cutoffs, "hash_move_cutoffs": self.hash_move_cutoffs,
+                "capture_cutoffs": self.capture_cutoffs, "killer_cutoffs": self.killer_cutoffs,
+                "quiet_cutoffs": self.quiet_cutoffs, "pvs_researches": self.pvs_researches,
+                "aspiration_researches": self.aspiration_researches, "null_move_cutoffs": self.null_move_cutoffs,
+                "reductions": self.reductions, "lmr_researches": self.lmr_researches,
+                "futility_prunes": self.futility_prunes, "razor_cutoffs": self.razor_cutoffs,
+                "mate_distance_cutoffs": self.mate_distance_cutoffs, "delta_prunes": self.delta_prunes,
+                "see_prunes": self.see_prunes, "deepest_quiescence": self.deepest_quiescence,
+                "first_move_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0}
+
+
+def time_budget(move_time=None, time_left=None, increment=0.0, moves_to_go=30, margin=0.05):
+    """Seconds to think about one move
+
+    Args:
+        move_time (float, optional): fixed time per move, wins over the clock
+        time_left (float, optional): remaining time on our clock
+        increment (float): time added to our clock after every move
+        moves_to_go (int): moves the remaining time is spread over
+        margin (float): kept in reserve so the clock never runs out
+
+    Returns:
+        float: seconds, None if there is no time limit at all
+    """
+    if move_time is not None:
+        return move_time
+    if time_left is None:
+        return None
+    return max(0.0, min(time_left / moves_to_go + increment * 3 / 4, time_left - margin))
 
-fen_number = 0
 
 class Node:
-    def __init__(self, fen_notation: str, is_white: bool):
-        global fen_number
-        self.fen: str = str(fen_number)
-        fen_number += 1
+    def __init__(self, fen_notation: str, is_white: bool, context=None):
+        self.fen: str = fen_notation
+        self.context: SearchContext = context
         self.alpha: float = 0
         self.beta: float = 0
         self.board: chessEngine.Board = None
@@ -24,9 +694,6 @@ class Node:
             self.evaluation: float = -10 ** 9
         else:
             self.evaluation: float = -10 ** 9
-        self.dead_piece = None
-        self.first_move = None
-        self.promoted = False
         self.moves = []
         self.stand_pat = 0
 
@@ -40,97 +707,10 @@ class Node:
         + c11*own_pass_pawns + c12*enemy_pass_pawns +c13*own_attackers + c14*enemy's_attackers +
         + c15*own_defenders + c16*enemy's_defenders
         """
-        evaluation = 0
-        rook_advantage = 0
-        c1_1 = 500
-        bishop_advantage = 0
-        c1_2 = 320
-        knight_advantage = 0
-        c1_3 = 330
-        queen_advantage = 0
-        c1_4 = 900
-        pawn_advantage = 0
-        c1_5 = 100
-        king_advantage = 0
-        c1_6 = 20000
-        bq = 0
-        bk = 0
-        bn = 0
-        br = 0
-        bb = 0
-        bp = 0
-        wq = 0
-        wk = 0
-        wn = 0
-        wr = 0
-        wb = 0
-        wp = 0
-        #board_array = self.board.get_str_arr()
-        piece_arr = self.board.pieces
-        bk = None
-        wk = None
-        for piece in piece_arr:
-            if piece:
-                if piece.name == "bishop" and piece.color == chessEngine.Color.BLACK:
-                    bb += 1
-                    bishop_advantage -= 1
-                    evaluation -= bpt.BISHOPS_TABLE[piece.position.row][7-piece.position.col]
-                elif piece.name == "knight" and piece.color == chessEngine.Color.BLACK:
-                    bn += 1
-                    knight_advantage -= 1
-                    evaluation -= bpt.KNIGHTS_TABLE[piece.position.row][7-piece.position.col]
-                elif piece.name == "pawn" and piece.color == chessEngine.Color.BLACK:
-                    bp += 1
-                    pawn_advantage -= 1
-                    evaluation -= bpt.PAWN_TABLE[piece.position.row][7-piece.position.col]
-                elif piece.name == "queen" and piece.color == chessEngine.Color.BLACK:
-                    bq += 1
-                    queen_advantage -= 1
-                    evaluation -= bpt.QUEENS_TABLE[piece.position.row][7-piece.position.col]
-                elif piece.name == "rook" and piece.color == chessEngine.Color.BLACK:
-                    br += 1
-                    rook_advantage -= 1
-                    evaluation -= bpt.ROOKS_TABLE[7-piece.position.row][7-piece.position.col]
-                elif piece.name == "bishop" and piece.color == chessEngine.Color.WHITE:
-                    wb += 1
-                    bishop_advantage += 1
-                    evaluation += bpt.BISHOPS_TABLE[7-piece.position.row][piece.position.col]
-                elif piece.name == "knight" and piece.color == chessEngine.Color.WHITE:
-                    wn += 1
-                    knight_advantage += 1
-                    evaluation += bpt.KNIGHTS_TABLE[7-piece.position.row][piece.position.col]
-                elif piece.name == "pawn" and piece.color == chessEngine.Color.WHITE:
-                    wp += 1
-                    pawn_advantage += 1
-                    evaluation += bpt.PAWN_TABLE[7-piece.position.row][piece.position.col]
-                elif piece.name == "queen" and piece.color == chessEngine.Color.WHITE:
-                    wq += 1
-                    queen_advantage += 1
-                    evaluation += bpt.QUEENS_TABLE[7-piece.position.row][piece.position.col]
-                elif piece.name == "rook" and piece.color == chessEngine.Color.WHITE:
-                    wr += 1
-                    rook_advantage += 1
-                    evaluation += bpt.ROOKS_TABLE[7-piece.position.row][piece.position.col]
-                elif piece.name == "king" and piece.color == chessEngine.Color.WHITE:
-                    wk = piece
-                elif piece.name == "king" and piece.color == chessEngine.Color.BLACK:
-                    bk = piece
-
-        if bk != None:
-            king_advantage -= 1
-            if (bq == 0 and wb + wn <= 1) or (wq == 0 and bb + bn <= 1) or (wb + wn <= 1 and bb + bn <= 1):
-                evaluation -= bpt.KINGS_ENDGAME_TABLE[bk.position.row][7-bk.position.col]
-                #print("endgame", wq, bq, bb, bn, wb, wn)
-            else:
-                evaluation -= bpt.KINGS_TABLE[bk.position.row][7-bk.position.col]
-        if wk != None:
-            king_advantage += 1
-            if (bq == 0 and wb + wn <= 1) or (wq == 0 and bb + bn <= 1) or (wb + wn <= 1 and bb + bn <= 1):
-                #print("endgame")
-                evaluation += bpt.KINGS_ENDGAME_TABLE[7-wk.position.row][7-wk.position.col]
-            else:
-                evaluation += bpt.KINGS_TABLE[7-wk.position.row][7-wk.position.col]
-        
+        board = self.board
+        # material, piece-square tables and kings (20000 each) are summed up by the board as it moves
+        evaluation = chessEngine.taper(board.middlegame, board.endgame, board.phase)
+
         # c2_1 = 0.01
         # rook_mobility_advantage = 0
         # for piece in self.board.pieces:
@@ -175,351 +755,303 @@ class Node:
         #         else:
         #             rook_mobility_advantage -= len(cm) + len(cc)
 
-        evaluation += c1_1 * rook_advantage
-        evaluation += c1_2 * bishop_advantage
-        evaluation += c1_3 * knight_advantage
-        evaluation += c1_4 * queen_advantage
-        evaluation += c1_5 * pawn_advantage
-        evaluation += c1_6 * king_advantage
         # evaluation += c2_1 * rook_mobility_advantage
         # evaluation += c2_2 * bishop_mobility_advantage
         # evaluation += c2_3 * knight_mobility_advantage
         # evaluation += c2_4 * queen_mobility_advantage
         return evaluation
 
-    def alpha_beta_evaluation(self, depth, alpha, beta, is_white_player, last_tile) -> float:
-        global counter
-        # global t_table
-        counter += 1
-        if counter % 10000 == 0:
-            print(counter)
-
-        w = self.is_won()
-        if w != 0:
-            return is_white_player * self.get_static_evaluation()
-        if depth <= 0:
-            return self.quiscence_search(0,alpha,beta,is_white_player,is_white_player*self.get_static_evaluation())
-
-        self.moves = self.board.all_moves()
-
-        value: float = - 10 ** 9
-        for move in self.moves:
-            self.move_straight(self.board, move)
-            n: Node = Node("self.board.get_FEN()", not self.is_white)
-            n.board = self.board
-            self.children.append(n)
-
-            # try:
-            #     entry = t_table[n.fen]
-            #     t_a, t_b, t_val, t_age = entry[0], entry[1], entry[2], entry[3]
-            # except KeyError:
-            #     t_a, t_b, t_val, t_age = None, None, None, None
-            # if t_val is None:
-            self.evaluation: float = - n.alpha_beta_evaluation(depth - 1, -beta, -alpha, -is_white_player, move[1])
-            # else:
-            #     self.evaluation = -t_val
-            value = max(value, self.evaluation)
-            alpha = max(alpha, value)
-            self.move_reverse(self.board, move)
-            if alpha >= beta:
-                self.evaluation = value
-                # print("pruned a")
-                break
-        self.evaluation = value
-        # if round(value,7) == 0:
-        #     print(depth, self.is_white, self.moves,exch_tile)
-        #     for n, i in enumerate(arr):
-        #         print(8 - n, *i)
-        #     print("  a  b  c  d  e  f  g  h")
-        #
-        #     raise Exception
-
-        # try:
-        #     entry = t_table[self.fen]
-        #     t_a,t_b,t_val,t_age = entry[0],entry[1],entry[2],entry[3]
-
-        #     t_table[self.fen] = (max(t_a,alpha),min(t_b,beta),max(t_val,self.evaluation),counter)
-        # except KeyError:
-        #     t_table[self.fen] = (alpha, beta, self.evaluation,counter)
-
-        return value
-
-    def move_straight(self, board: chessEngine.Board, move):
-        if board.active_color == chessEngine.Color.WHITE:
-            board.active_color = chessEngine.Color.BLACK
-        else:
-            board.active_color = chessEngine.Color.WHITE
-        self.dead_piece = None
-        # arr = board.get_str_arr()
-        # print("-"*24)
-        # for i in arr:
-        #     print("|".join(i))
-        # print("-"*24)
-        for i in range(len(board.pieces)):
-            if board.pieces[i].position.row == move[1][0] and board.pieces[i].position.col == move[1][1]:
-                self.dead_piece = board.pieces[i]
-                board.pieces = board.pieces[:i] + board.pieces[i + 1:]
-                break
-        for i in range(len(board.pieces)):
-            if board.pieces[i].position.row == move[0][0] and board.pieces[i].position.col == move[0][1]:
-                if board.pieces[i].name == "pawn":
-                    if board.pieces[i].color == chessEngine.Color.WHITE and move[1][0] == 7:
-                        self.promoted = True
-                        board.pieces[i].name = "queen"
-                    if board.pieces[i].color == chessEngine.Color.BLACK and move[1][0] == 0:
-                        self.promoted = True
-                        board.pieces[i].name = "queen"
-                        
-                board.pieces[i].position.row = move[1][0]
-                board.pieces[i].position.col = move[1][1]
-                if board.pieces[i].first_move:
-                    self.first_move = True
-                    board.pieces[i].first_move = False
-                else:
-                    self.first_move = False
-                break
+    def get_evaluation_breakdown(self):
+        """Splits the static evaluation into its terms, for tuning
 
-    def move_reverse(self, board: chessEngine.Board, move):
-        if board.active_color == chessEngine.Color.WHITE:
-            board.active_color = chessEngine.Color.BLACK
-        else:
-            board.active_color = chessEngine.Color.WHITE
-        for i in range(len(board.pieces)):
-            if board.pieces[i].position.row == move[1][0] and board.pieces[i].position.col == move[1][1]:
-                board.pieces[i].position.row = move[0][0]
-                board.pieces[i].position.col = move[0][1]
-                if self.first_move is not None:
-                    board.pieces[i].first_move = self.first_move
-                    self.first_move = None
-                else:
-                    raise Exception
-                if self.dead_piece != None:
-                    board.pieces.append(self.dead_piece)
-                    self.dead_piece = None
-                if self.promoted:
-                    board.pieces[i].name = "pawn"
-                    self.promoted = False
-                return
-        raise Exception
+        Returns:
+            dict: term -> (middlegame, endgame, tapered), from white's side, plus "phase"
+        """
+        board = self.board
+        terms = {"material": [0, 0]}
+        terms.update((name, [0, 0]) for name in chessEngine.PIECE_NAMES)
+        for square, piece in enumerate(board.mailbox):
+            if piece is None:
+                continue
+            sign = 1 if piece.side == WHITE else -1
+            terms["material"][0] += sign * chessEngine.MATERIAL[piece.kind]
+            terms["material"][1] += sign * chessEngine.MATERIAL[piece.kind]
+            terms[piece.name][0] += chessEngine.PST_MIDDLEGAME[piece.side][piece.kind][square]
+            terms[piece.name][1] += chessEngine.PST_ENDGAME[piece.side][piece.kind][square]
+        breakdown = {name: (mg, eg, chessEngine.taper(mg, eg, board.phase)) for name, (mg, eg) in terms.items()}
+        breakdown["phase"] = board.phase
+        return breakdown
+
+    def alpha_beta_evaluation(self, depth, alpha, beta, is_white_player, last_tile, ply=0) -> float:
+        """SearchContext.search of self.board that keeps the searched tree below this node
+
+        is_white_player and last_tile are no longer needed, the board knows the side to move.
+        """
+        self.evaluation = self.context.search(self.board, depth, alpha, beta, ply, self)
+        return self.evaluation
 
     def quiscence_search(self, depth: int, alpha: float, beta: float, is_white_player, stand_pat: float):
-        global counter,mmax
-        if mmax>depth:
-            print("max: ",mmax)
-            mmax = depth
-        counter += 1
-        if counter % 10000 == 0:
-            print(counter, "q")
-        delta = 2
-        self.board: chessEngine.Board
-        moves = self.board.all_moves()
-        self.moves = []
-        board_arr = self.board.get_str_arr()
-
-        if self.is_won() != 0 or depth <= -6:
-            return is_white_player*self.get_static_evaluation()
-
-
-        value = stand_pat
-        for move in moves:
-            is_capture = False
-            f_pos = board_arr[move[0][0]][move[0][1]]
-            s_pos = board_arr[move[1][0]][move[1][1]]
-            if (f_pos[0] !=" ") and (s_pos[0] !=" ") and (f_pos[0] != s_pos[0]):
-                # arr = board_arr
-                # print(
-                #     f"color: {self.board.active_color}, W: {self.board.score[chessEngine.Color.WHITE]}, B: {self.board.score[chessEngine.Color.BLACK]}")
-                # for n_, i in enumerate(arr):
-                #     print(8 - n_, *i)
-                # print("  a  b  c  d  e  f  g  h")
-                # print("("+f_pos+")"+" "+"("+s_pos+")")
-                # print(move)
-                is_capture = True
-            self.move_straight(self.board,move)
-            n = Node("self.board.get_FEN()", not self.is_white)
-            n.board = self.board
-
-            child_evaluation = is_white_player*n.get_static_evaluation()
-            if is_capture and child_evaluation + delta >= stand_pat:
-            # if (not n.board.check_check(BLACK if n.board.active_color == WHITE else WHITE)) and (n.board.check_check(BLACK if n.board.active_color == BLACK else WHITE) or (is_capture and child_evaluation + delta >= stand_pat)):
-                # if n.board.check_check(BLACK if n.board.active_color == BLACK else WHITE):
-                #
-                #
-                #     arr = board_arr
-                #     print(
-                #         f"color: {n.board.active_color}, W: {n.board.score[chessEngine.Color.WHITE]}, B: {n.board.score[chessEngine.Color.BLACK]}")
-                #     for n_, i in enumerate(arr):
-                #         print(8 - n_, *i)
-                #     print("  a  b  c  d  e  f  g  h")
-
-
-                self.children.append(n)
-                self.moves.append(move)
-
-
-                # try:
-                #     entry = t_table[n.fen]
-                #     t_a,t_b,t_val,t_age = entry[0],entry[1],entry[2],entry[3]
-                # except KeyError:
-                #     t_a,t_b,t_val,t_age = None,None,None,None
-                # if t_val is None:
-                self.evaluation = -n.quiscence_search(depth-1,-beta,-alpha,-is_white_player,-child_evaluation)
-                # else:
-                #     self.evaluation = -t_val
-
-
-                value = max(self.evaluation,value)
-                alpha = max(alpha,value)
-
-            self.move_reverse(self.board,move)
-            if alpha >= beta:
-                self.evaluation = value
-                break
-        self.evaluation = value
-
-        # try:
-        #     entry = t_table[self.fen]
-        #     t_a,t_b,t_val,t_age = entry[0],entry[1],entry[2],entry[3]
-
-        #     t_table[self.fen] = (max(t_a,alpha),min(t_b,beta),max(t_val,self.evaluation),counter)
-        # except KeyError:
-        #     t_table[self.fen] = (alpha, beta, self.evaluation,counter)
-
-
-        #print(in_len,len(self.moves))
-        # if len(self.moves) >=20:
-        #     arr = board_arr
-        #     print(
-        #         f"color: {self.board.active_color}, W: {self.board.score[chessEngine.Color.WHITE]}, B: {self.board.score[chessEngine.Color.BLACK]}")
-        #     for n_, i in enumerate(arr):
-        #         print(8 - n_, *i)
-        #     print("  a  b  c  d  e  f  g  h")
-        #     for move in self.moves:
-        #         print(move)
-        #     raise Exception
-        return value
-
-    def get_static_exchange_evaluation(self, depth: int, alpha: float, beta: float, is_white_player, exch_tile):
-        global counter
-        counter += 1
-        if counter % 10000 == 0:
-            print(counter, "e")
-
-        # arr = self.board.get_str_arr()
-        # print(depth, self.is_white, self.moves,exch_tile)
-        # for n, i in enumerate(arr):
-        #     print(8 - n, *i)
-        # print("  a  b  c  d  e  f  g  h")
-        moves = self.board.all_captures()
-        self.moves = []
-        for move in moves:
-            if move[1][0] == exch_tile[0] and move[1][1] == exch_tile[1]:
-                self.moves.append(move)
-
-        w = self.is_won()
-        if w != 0 or len(self.moves) == 0:
-            return is_white_player * self.get_static_evaluation()
-
-        value: float = - 10 ** 9
-        for move in self.moves:
-            self.move_straight(self.board, move)
-            n: Node = Node("self.board.get_FEN()", not self.is_white)
-            n.board = self.board
-            self.children.append(n)
-
-            self.evaluation: float = - n.alpha_beta_evaluation(depth - 1, -beta, -alpha, -is_white_player, move[1])
-            value = max(value, self.evaluation)
-            alpha = max(alpha, value)
-            self.move_reverse(self.board, move)
-            if beta <= alpha:
-                self.evaluation = value
-                # print("pruned a")
-                break
-        self.evaluation = value
-        # if round(value,7) == 0:
-        #     print(depth, self.is_white, self.moves,exch_tile)
-        #     for n, i in enumerate(arr):
-        #         print(8 - n, *i)
-        #     print("  a  b  c  d  e  f  g  h")
-        #
-        #     raise Exception
-        return value
+        self.evaluation = self.context.quiescence(self.board, depth, alpha, beta, stand_pat, node=self)
+        return self.evaluation
 
     def is_won(self):
-        king_advantage = 0
-        board_array = self.board.get_str_arr()
-
-        for line in board_array:
-            for tile in line:
-                if tile == "BK":
-                    king_advantage -= 1
-                elif tile == "WK":
-                    king_advantage += 1
-        return king_advantage
+        """+1 if only the white king is left, -1 if only the black one, 0 otherwise"""
+        king_square = self.board.king_square
+        return (king_square[WHITE] is not None) - (king_square[BLACK] is not None)
 
 
 class GameTree:
-    def __init__(self, fen_notation, is_white):
-        self.root: Node = Node(fen_notation, is_white)
-        self.root.fen = fen_notation
+    """
+    Search from one position
+
+    retain_tree: keep every searched node as a Node below root (debugging, grows with the node count);
+        otherwise the search allocates nothing per node and only self.pv is left of it
+    context: SearchContext the search runs in, a new one unless given; pass the same one for
+        the moves of one game to keep its tables between iterative_deepening calls (lazy_smp
+        workers use their own contexts and table)
+    """
+
+    def __init__(self, fen_notation, is_white, retain_tree=True, context=None):
+        self.context = SearchContext() if context is None else context
+        self.root: Node = Node(fen_notation, is_white, self.context)
         if is_white:
             self.evaluation: float = -10 ** 9
         else:
             self.evaluation: float = 10 ** 9
         self.is_white = is_white
+        self.retain_tree = retain_tree
+        self.pv = []
+
+    def _search_root(self, depth, alpha, beta):
+        if self.retain_tree:
+            return self.root.alpha_beta_evaluation(depth, alpha, beta, 1 if self.root.is_white else -1, None)
+        return self.context.search(self.root.board, depth, alpha, beta)
 
     def alpha_beta_evaluation(self, depth):
         self.root.board = chessEngine.Board.from_FEN(self.root.fen)
-        self.evaluation = self.root.alpha_beta_evaluation(depth, -10 ** 9, 10 ** 9, 1 if self.root.is_white else -1,
-                                                          None)
+        self.context.new_search()
+        self.evaluation = self._search_root(depth, -10 ** 9, 10 ** 9)
+        self.pv = self.context.pv.line()
         print('a')
         return self.evaluation
 
-    def suggest_move(self, depth=None):
-        # global t_table
-        # t_table.clear()
-        self.evaluation = 10 ** 9
+    def iterative_deepening(self, max_depth=64, move_time=None, time_left=None, increment=0.0, max_nodes=None,
+                            start_depth=1, stop=None, on_info=None):
+        """Searches to depth 1, 2, ... until `max_depth` or until the time or node budget runs out
+
+        The transposition table, killers and history are kept between iterations, so every iteration
+        starts with the best moves of the previous one. From depth 2 on the root window is
+        ASPIRATION_WINDOW around the previous score and widened whenever the score falls outside.
+        An unfinished iteration is thrown away.
+
+        Args:
+            max_depth (int): deepest iteration
+            move_time, time_left, increment (float, optional): budget in seconds, see time_budget
+            max_nodes (int, optional): hard node limit
+            start_depth (int): first iteration, Lazy SMP helpers skip ahead
+            stop (threading.Event, optional): stop token, setting it from another thread ends the search
+                within milliseconds with the result of the last completed iteration
+            on_info (callable, optional): called after every completed iteration with a dict of its
+                depth, score (centipawns for the side to move), nodes, time (seconds), nps and pv (packed moves)
+
+        Returns:
+            tuple: (best move of the last completed iteration, its evaluation, its depth),
+                the whole line is left in self.pv; the move is NULL_MOVE when the root has no legal move
+        """
+        context = self.context
+        self.root.board = chessEngine.Board.from_FEN(self.root.fen)
+        context.new_search(stop)
+        self.best_move, self.depth, self.pv = chessEngine.NULL_MOVE, 0, []
+        limits = context.limits = SearchLimits(time_budget(move_time, time_left, increment), max_nodes, context.nodes)
+        try:
+            for depth in range(start_depth, max_depth + 1):
+                if depth > start_depth and not limits.may_start_iteration():
+                    break
+                alpha, beta, window = -10 ** 9, 10 ** 9, ASPIRATION_WINDOW
+                if depth > 1 and abs(self.evaluation) < MATE_BOUND:
+                    alpha, beta = self.evaluation - window, self.evaluation + window
+                while True:
+                    evaluation = self._search_root(depth, alpha, beta)
+                    if alpha < evaluation < beta:
+                        break
+                    context.aspiration_researches += 1
+                    window *= 4
+                    if evaluation <= alpha:
+                        alpha = max(evaluation - window, -10 ** 9)
+                    else:
+                        beta = min(evaluation + window, 10 ** 9)
+                self.pv = context.pv.line()
+                self.best_move = self.pv[0] if self.pv else self.best_root_move()[0] or chessEngine.NULL_MOVE
+                self.evaluation, self.depth = evaluation, depth
+                if on_info is not None:
+                    on_info(search_info(depth, evaluation, context.nodes - limits.start_nodes, limits.elapsed, self.pv))
+                if abs(evaluation) >= MATE_BOUND:
+                    break  # a shorter mate would have been found by an earlier iteration
+        except SearchAborted:
+            pass
+        finally:
+            context.limits = None
+        if self.depth == 0:  # not even depth 1 finished, play the first move the search would try
+            board = chessEngine.Board.from_FEN(self.root.fen)
+            self.best_move = next(board.staged_moves(), chessEngine.NULL_MOVE)
+        return self.best_move, self.evaluation, self.depth
+
+    def lazy_smp(self, workers=None, max_depth=64, move_time=None, time_left=None, increment=0.0, max_nodes=None,
+                 hash_mb=16, stop=None, on_info=None):
+        """Lazy SMP: `workers` processes run iterative_deepening from the root at once and share one
+        transposition table in shared memory
+
+        Every odd worker starts one iteration deeper, so the workers fall out of step and fill the table
+        for each other instead of searching the same nodes in the same order. The time budget counts
+        from this call, `max_nodes` applies to every worker on its own. `stop` and `on_info` work as in
+        iterative_deepening; on_info gets every iteration deeper than the ones reported before, by any
+        worker, with the nodes of all workers.
+
+        Every call starts new processes on a new, empty table and leaves self.context.t_table alone.
+        That costs a fair part of a short budget: at 2 s a move 4 workers reached depth 4 on Kiwipete
+        where iterative_deepening reached depth 5, so it only pays off with longer searches and free cores.
+
+        Returns:
+            tuple: (best move, evaluation, depth) of the worker that completed the deepest iteration,
+                its line is left in self.pv and all results in self.worker_results
+        """
+        workers = workers or os.cpu_count() or 1
+        budget = time_budget(move_time, time_left, increment)
+        deadline = None if budget is None else time.time() + budget
+        start = time.perf_counter()
+        table = TranspositionTable(hash_mb, shared=True)
+        processes = _process_context()
+        results, halt = processes.Queue(), processes.Event()
+        pool = [processes.Process(target=_lazy_smp_worker, daemon=True,
+                                  args=(worker, self.root.fen, self.is_white, table.name, hash_mb,
+                                        self.context.options, deadline, max_depth, max_nodes, results, halt,
+                                        on_info is not None))
+                for worker in range(workers)]
+        self.worker_results = []
+        worker_nodes, reported_depth = [0] * workers, 0
+        try:
+            for process in pool:
+                process.start()
+            while len(self.worker_results) < workers:
+                if stop is not None and stop.is_set():
+                    halt.set()
+                try:
+                    message = results.get(timeout=0.01)
+                except queue.Empty:
+                    if not any(process.is_alive() for process in pool) and results.empty():
+                        break  # a worker died without a result
+                    continue
+                if message[0] == "result":
+                    self.worker_results.append(message[1:])
+                    continue
+                _, worker, info = message
+                worker_nodes[worker] = info["nodes"]
+                if info["depth"] > reported_depth:
+                    reported_depth = info["depth"]
+                    on_info(search_info(info["depth"], info["score"], sum(worker_nodes),
+                                        time.perf_counter() - start, info["pv"]))
+            for process in pool:
+                process.join()
+        finally:
+            for process in pool:
+                if process.is_alive():
+                    process.terminate()
+            table.unlink()
+        self.worker_results.sort()
+        if self.worker_results:
+            _, self.best_move, self.evaluation, self.depth, self.pv, _ = max(
+                self.worker_results, key=lambda result: (result[3], -result[0]))
+        else:
+            board = chessEngine.Board.from_FEN(self.root.fen)
+            self.best_move, self.depth, self.pv = next(board.staged_moves(), chessEngine.NULL_MOVE), 0, []
+        return self.best_move, self.evaluation, self.depth
+
+    def search_stats(self):
+        """Move ordering and transposition table statistics of the last search"""
+        stats = self.context.stats()
+        stats["tt"] = self.context.t_table.stats()
+        return stats
+
+    def best_root_move(self):
+        """Returns (move, child) of the root child the last search scored best for the side to move"""
+        evaluation = 10 ** 9
         ret_move = None
         ret_child = None
         for i in range(len(self.root.children)):
-
-            if self.root.children[i].evaluation < self.evaluation:
-                self.evaluation = self.root.children[i].evaluation
+            if self.root.children[i].evaluation < evaluation:
+                evaluation = self.root.children[i].evaluation
                 ret_move = self.root.moves[i]
                 ret_child = self.root.children[i]
+        return ret_move, ret_child
 
-        fout = open("bestMoveLogger.txt","w")
+    def suggest_move(self, depth=None):
+        ret_move, ret_child = self.best_root_move()
+        if ret_child is not None:
+            self.evaluation = ret_child.evaluation
+        elif self.pv:  # the tree was not kept
+            ret_move, self.evaluation = self.pv[0], -self.evaluation
+        else:
+            self.evaluation = 10 ** 9
 
+        fout = open("bestMoveLogger.txt","w")
 
-        go = True
-        log_node = Node(self.root.fen,self.is_white)
-        log_node.board = chessEngine.Board.from_FEN(self.root.fen)
-        node = self.root
-        while go:
-            go = False
-            arr = log_node.board.get_str_arr()
+        # the principal variation, one board per position
+        log_board = chessEngine.Board.from_FEN(self.root.fen)
+        for move in self.pv + [None]:
+            arr = log_board.get_str_arr()
             for n, i in enumerate(arr):
                 fout.write(str(8 - n) + "|")
                 for j in i:
                     fout.write(str(j) + "|")
                 fout.write("\n")
             fout.write("  a  b  c  d  e  f  g  h" + "\n" + "\n")
+            if move is not None:
+                log_board.make_move(move)
 
-            for i in range(len(node.children)):
-                if round(node.children[i].evaluation,5) == round(-node.evaluation,5):
-                    go = True
-                    log_node.move_straight(log_node.board,node.moves[i])
-                    node = node.children[i]
+        fout.close()
 
-                    break
 
 
+        return ret_move, ret_child
 
-        fout.close()
 
+def _process_context():
+    """multiprocessing context for search workers
 
+    Where it exists the forkserver is used, with the calling script and the engine preloaded: forking
+    a process that runs Tk and threads is unsafe, and spawning imports everything again every move.
+    The calling script has to guard its entry point with `if __name__ == "__main__"`.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        processes = multiprocessing.get_context("forkserver")
+        processes.set_forkserver_preload(["__main__", "chessLogic"])
+        return processes
+    return multiprocessing.get_context("spawn")
 
-        return ret_move, ret_child
+
+def search_info(depth, score, nodes, seconds, pv):
+    """The dict an on_info callback gets after a completed iteration"""
+    return {"depth": depth, "score": score, "nodes": nodes, "time": seconds,
+            "nps": int(nodes / seconds) if seconds > 0 else 0, "pv": list(pv)}
+
+
+def _lazy_smp_worker(worker, fen, is_white, table_name, hash_mb, options, deadline, max_depth, max_nodes, results,
+                     halt, report):
+    """Body of a GameTree.lazy_smp worker process
+
+    Puts ("result", worker, move, evaluation, depth, pv, nodes) on `results` when it is done,
+    and with `report` ("info", worker, info) after every iteration. `halt` is its stop token.
+    """
+    context = SearchContext(options, TranspositionTable(hash_mb, shared=table_name))
+    try:
+        tree = GameTree(fen, is_white, retain_tree=False, context=context)
+        move_time = None if deadline is None else max(0.0, deadline - time.time())
+        move, evaluation, depth = tree.iterative_deepening(
+            max_depth, move_time=move_time, max_nodes=max_nodes, start_depth=1 + worker % 2, stop=halt,
+            on_info=(lambda info: results.put(("info", worker, info))) if report else None)
+        results.put(("result", worker, move, evaluation, depth, tree.pv, context.stats()["nodes"]))
+    finally:
+        context.t_table.close()
 
 
 def main():
@@ -543,7 +1075,7 @@ def main():
     print("  a  b  c  d  e  f  g  h")
     while True:
         print(board.get_FEN())
-        print(board.all_moves())
+        print([chessEngine.move_to_uci(move) for move in board.all_moves()])
         if board.active_color == chessEngine.Color.BLACK:
 
             move = input("your move: ").split()
@@ -561,11 +1093,12 @@ def main():
             print("-----------------------------------------------------")
 
             for i in range(len(game_tree.root.children)):
-                print(game_tree.root.moves[i], game_tree.root.children[i].evaluation)
+                print(chessEngine.move_to_uci(game_tree.root.moves[i]), game_tree.root.children[i].evaluation)
 
             print("-----------------------------------------------------")
 
-            print(move)
+            print(chessEngine.move_to_uci(move))
+            move = chessEngine.move_to_list(move)
             print(board.move_piece(board.arr[move[0][0]][move[0][1]], chessEngine.Position(move[1][0], move[1][1])))
         arr = board.get_str_arr()
         print(
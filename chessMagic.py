@@ -0,0 +1,272 @@
+#########################################################
+#                                                       #
+#    Magic bitboard lookup tables for sliding pieces    #
+#                                                       #
+#    attacks = TABLE[offset + ((occupied & mask)        #
+#                    * magic & FULL) >> shift]          #
+#                                                       #
+#    The tables are built from the magic numbers        #
+#    below once, saved to a cache file and loaded       #
+#    with array.frombytes on the next start.            #
+#                                                       #
+#    python chessMagic.py --verify    check tables      #
+#    python chessMagic.py --rebuild   rewrite cache     #
+#    python chessMagic.py --find      search magics     #
+#                                                       #
+#########################################################
+
+import os
+import sys
+import random
+import hashlib
+import argparse
+from array import array
+
+import chessTables
+
+FULL = 0xFFFFFFFFFFFFFFFF
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "magicTables.bin")
+CACHE_VERSION = 1
+
+# found by `python chessMagic.py --find --seed 2023`
+ROOK_MAGICS = (
+    0x258000815028C000, 0x0540021002442000, 0x8100110020000842, 0x4080100008008004,
+    0x8200100802000520, 0x0200100804020001, 0x0880020015000880, 0x0300042610408100,
+    0x0600802080004005, 0x0800402010004000, 0x4284801002802000, 0x1001000821001002,
+    0x0002808004000800, 0x0002001002000408, 0x0045001412000100, 0x00820021088C4402,
+    0x0140008000288840, 0x1020014001300048, 0x6060008010002082, 0x0038010100100020,
+    0x0208004004020040, 0x1800808002000400, 0x2C00040001081002, 0x00009A0001004484,
+    0x1200400080208000, 0x00C0004040201000, 0x4000200080100080, 0x0000080080100080,
+    0x0020040080800800, 0x8080040080020080, 0x0084020400081001, 0x6000040200284889,
+    0x0080002000404000, 0x6070004000402000, 0x2000204082001200, 0x0020100101000C21,
+    0x0403080101000411, 0x5040040080800200, 0x020E000406000809, 0x0000010082000044,
+    0x000040008000802A, 0xA810052008484000, 0x0030002000808010, 0x4000100008008080,
+    0x8008080011010005, 0x1801401004880120, 0x0820100201840008, 0x0201004120820004,
+    0x1080008040002080, 0x0101008030420200, 0x3021002000104100, 0x0000201001040900,
+    0xA018040080080180, 0x0002040080020080, 0x00483032484D0400, 0x0200040041208200,
+    0x0308104021088202, 0x8012441081002206, 0x81201100400A2001, 0x0030000408201101,
+    0x0042001004210882, 0x4402000801100482, 0x2004082201100084, 0x00127C0700E0C082,
+)
+
+BISHOP_MAGICS = (
+    0x0040088200820010, 0x4002100D62008002, 0x0011110A02012220, 0x0084105200031842,
+    0x8244042205000004, 0x2002120220100502, 0x2104008808894821, 0x0828C20150280434,
+    0x01C0A002320A0420, 0x04011210021E8100, 0x0866108082104100, 0x2000040408840008,
+    0x0000011040800046, 0x6000010120100000, 0x800C00481210101B, 0x0E4800C40AC41000,
+    0x0015282808488800, 0x00080022100C0084, 0x0604100204041200, 0x0288002420441000,
+    0x2094008822081402, 0x0001400808082C00, 0x1802070B48222840, 0x000340802C060800,
+    0x00A0440212100A00, 0x03021004200400E0, 0x0002208830050040, 0x0004200824010004,
+    0x000604004200820A, 0x402104082A008404, 0x5188120200421288, 0x1840888082020082,
+    0x1108044000100200, 0x4014044404021004, 0x0000442082100101, 0x1104020080080080,
+    0x5422008400020020, 0x0001280A00002200, 0x0210040080824A22, 0x0002240100802080,
+    0x0001086011220448, 0x0404008804000880, 0x0202010048000100, 0x0010004010448200,
+    0x2609012124000A01, 0x004005080080130A, 0x8004082204018840, 0x4002208401000080,
+    0x0082080405040000, 0x000109008220000A, 0x0000104044108084, 0x140C400084040000,
+    0x0010880420820010, 0x2802208441620018, 0x404808A860840000, 0x1004012401061000,
+    0x2080150808023820, 0x0008050401010804, 0x2210000080844110, 0x040040000842020C,
+    0x104000402003440C, 0x8040002020223081, 0x4801111002080041, 0x80042802024C1101,
+)
+
+
+def _relevant_mask(square, directions):
+    """Squares whose occupancy changes the attack set: every ray without its edge square"""
+    mask = 0
+    for direction in directions:
+        for row, col in chessTables.RAYS[direction][square][:-1]:
+            mask |= 1 << (row * 8 + col)
+    return mask
+
+
+def _subsets(mask):
+    """Yields every subset of `mask` (Carry-Rippler enumeration)"""
+    subset = 0
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if subset == 0:
+            break
+
+
+ROOK_MASKS = tuple(_relevant_mask(square, chessTables.ROOK_RAYS) for square in range(64))
+BISHOP_MASKS = tuple(_relevant_mask(square, chessTables.BISHOP_RAYS) for square in range(64))
+ROOK_SHIFTS = tuple(64 - mask.bit_count() for mask in ROOK_MASKS)
+BISHOP_SHIFTS = tuple(64 - mask.bit_count() for mask in BISHOP_MASKS)
+
+
+def _offsets(shifts):
+    offsets, total = [], 0
+    for bits in shifts:
+        offsets.append(total)
+        total += 1 << (64 - bits)
+    return tuple(offsets), total
+
+
+ROOK_OFFSETS, ROOK_TABLE_SIZE = _offsets(ROOK_SHIFTS)
+BISHOP_OFFSETS, BISHOP_TABLE_SIZE = _offsets(BISHOP_SHIFTS)
+
+
+def find_magic(square, directions, rnd):
+    """Searches a magic number mapping every relevant occupancy of `square` without a harmful collision
+
+    Args:
+        square (int): square of the slider
+        directions (tuple): chessTables rays of the slider
+        rnd (random.Random): source of candidate numbers
+
+    Returns:
+        int: magic number
+    """
+    mask = _relevant_mask(square, directions)
+    shift = 64 - mask.bit_count()
+    occupancies = list(_subsets(mask))
+    attacks = [chessTables.ray_attacks(square, occupied, directions) for occupied in occupancies]
+    while True:
+        magic = rnd.getrandbits(64) & rnd.getrandbits(64) & rnd.getrandbits(64)
+        if (((mask * magic) & FULL) >> 56).bit_count() < 6:
+            continue
+        used = [None] * (1 << (64 - shift))
+        for occupied, attack in zip(occupancies, attacks):
+            index = ((occupied * magic) & FULL) >> shift
+            if used[index] is None:
+                used[index] = attack
+            elif used[index] != attack:
+                break
+        else:
+            return magic
+
+
+def _build_table(magics, masks, shifts, offsets, size, directions):
+    table = array("Q", bytes(8 * size))
+    for square in range(64):
+        magic, shift, offset = magics[square], shifts[square], offsets[square]
+        for occupied in _subsets(masks[square]):
+            table[offset + (((occupied * magic) & FULL) >> shift)] = chessTables.ray_attacks(square, occupied,
+                                                                                             directions)
+    return table
+
+
+def build_tables():
+    """Computes the rook and bishop attack tables from the magic numbers
+
+    Returns:
+        tuple: (rook table, bishop table) as array('Q')
+    """
+    rook_table = _build_table(ROOK_MAGICS, ROOK_MASKS, ROOK_SHIFTS, ROOK_OFFSETS, ROOK_TABLE_SIZE,
+                              chessTables.ROOK_RAYS)
+    bishop_table = _build_table(BISHOP_MAGICS, BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_OFFSETS, BISHOP_TABLE_SIZE,
+                                chessTables.BISHOP_RAYS)
+    return rook_table, bishop_table
+
+
+def _cache_header():
+    """Identifies the magics the cache was built from, so stale files are rebuilt"""
+    digest = hashlib.sha1(repr((CACHE_VERSION, sys.byteorder, ROOK_MAGICS, BISHOP_MAGICS)).encode()).digest()
+    return b"CMAG" + digest
+
+
+def save_tables(rook_table, bishop_table, path=CACHE_PATH):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_cache_header())
+        rook_table.tofile(f)
+        bishop_table.tofile(f)
+    os.replace(temp_path, path)  # another process never sees a half written file
+
+
+def load_tables(path=CACHE_PATH):
+    """Reads the tables from the cache file
+
+    Returns:
+        tuple: (rook table, bishop table), or None if the file is missing or stale
+    """
+    header = _cache_header()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if data[:len(header)] != header or len(data) != len(header) + 8 * (ROOK_TABLE_SIZE + BISHOP_TABLE_SIZE):
+        return None
+    rook_table, bishop_table = array("Q"), array("Q")
+    start = len(header)
+    rook_table.frombytes(data[start:start + 8 * ROOK_TABLE_SIZE])
+    bishop_table.frombytes(data[start + 8 * ROOK_TABLE_SIZE:])
+    return rook_table, bishop_table
+
+
+def _load_or_build():
+    tables = load_tables()
+    if tables is None:
+        tables = build_tables()
+        try:
+            save_tables(*tables)
+        except OSError:
+            pass  # read-only install, the tables just stay in memory
+    return tables
+
+
+ROOK_TABLE, BISHOP_TABLE = _load_or_build()
+
+# per square (mask, magic, shift, offset), one tuple unpack per lookup
+ROOK_ENTRIES = tuple(zip(ROOK_MASKS, ROOK_MAGICS, ROOK_SHIFTS, ROOK_OFFSETS))
+BISHOP_ENTRIES = tuple(zip(BISHOP_MASKS, BISHOP_MAGICS, BISHOP_SHIFTS, BISHOP_OFFSETS))
+
+
+def rook_attacks(square, occupied):
+    mask, magic, shift, offset = ROOK_ENTRIES[square]
+    return ROOK_TABLE[offset + (((occupied & mask) * magic & FULL) >> shift)]
+
+
+def bishop_attacks(square, occupied):
+    mask, magic, shift, offset = BISHOP_ENTRIES[square]
+    return BISHOP_TABLE[offset + (((occupied & mask) * magic & FULL) >> shift)]
+
+
+def queen_attacks(square, occupied):
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+
+
+def verify():
+    """Checks every table entry against the ray-walking attack generator of chessEngine
+
+    Returns:
+        int: number of mismatching (square, occupancy) pairs
+    """
+    import chessEngine
+    errors = 0
+    for square in range(64):
+        for lookup, masks, directions in ((rook_attacks, ROOK_MASKS, chessEngine.ROOK_DIRECTIONS),
+                                          (bishop_attacks, BISHOP_MASKS, chessEngine.BISHOP_DIRECTIONS)):
+            for occupied in _subsets(masks[square]):
+                if lookup(square, occupied) != chessEngine.sliding_attacks(square, occupied, directions):
+                    errors += 1
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Magic bitboard tables for sliding pieces")
+    parser.add_argument("--verify", action="store_true", help="compare the tables with ray walking")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the tables and rewrite the cache")
+    parser.add_argument("--find", action="store_true", help="search new magic numbers and print them")
+    parser.add_argument("--seed", type=int, default=2023, help="random seed for --find")
+    args = parser.parse_args()
+
+    if args.find:
+        rnd = random.Random(args.seed)
+        for name, directions in (("ROOK_MAGICS", chessTables.ROOK_RAYS), ("BISHOP_MAGICS", chessTables.BISHOP_RAYS)):
+            magics = [find_magic(square, directions, rnd) for square in range(64)]
+            print(f"{name} = (")
+            for i in range(0, 64, 4):
+                print("    " + " ".join(f"0x{magic:016X}," for magic in magics[i:i + 4]))
+            print(")")
+    if args.rebuild:
+        save_tables(*build_tables())
+        print(f"saved {CACHE_PATH}")
+    if args.verify:
+        errors = verify()
+        print("ok" if errors == 0 else f"{errors} mismatches")
+        sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#########################################################
+#                                                       #
+#    Perft: counts the leaf nodes of the legal move     #
+#    tree to a fixed depth, checks the move generator   #
+#    against known counts and measures its speed        #
+#                                                       #
+#    python chessPerft.py --depth 3                     #
+#    python chessPerft.py --depth 2 --divide "<FEN>"    #
+#    python chessPerft.py --suite --depth 3             #
+#                                                       #
+#########################################################
+
+import sys
+import time
+import argparse
+
+import chessEngine
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# (name, FEN, leaf counts for depth 1, 2, ...), from the Chess Programming Wiki
+REFERENCE_POSITIONS = (
+    ("start", START_FEN, (20, 400, 8902, 197281, 4865609)),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     (48, 2039, 97862, 4085603)),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2812, 43238, 674624)),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", (6, 264, 9467, 422333)),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", (44, 1486, 62379, 2103487)),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     (46, 2079, 89890, 3894594)),
+)
+
+
+def perft(board, depth, legal=True):
+    """Counts the legal move sequences of length `depth` from the position on `board`
+
+    With `legal` the moves come from Board.legal_moves and the last ply is only counted, otherwise
+    from Board.all_moves with the ones leaving the own king attacked skipped, which checks
+    the two generators against each other. The board is back in its starting position when
+    the function returns.
+    """
+    if depth <= 0:
+        return 1
+    nodes = 0
+    if legal:
+        moves = board.legal_moves()
+        if depth == 1:
+            return len(moves)
+        for move in moves:
+            board.make_move(move)
+            nodes += perft(board, depth - 1)
+            board.unmake_move()
+        return nodes
+    for move in board.all_moves():
+        board.make_move(move)
+        if not board.in_check(board.side ^ 1):
+            nodes += 1 if depth == 1 else perft(board, depth - 1, False)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth, legal=True):
+    """Perft split by root move
+
+    Returns:
+        list: (UCI move, leaf count) for every legal root move
+    """
+    counts = []
+    for move in board.legal_moves():
+        board.make_move(move)
+        counts.append((chessEngine.move_to_uci(move), perft(board, depth - 1, legal)))
+        board.unmake_move()
+    return counts
+
+
+def timed_perft(fen, depth, legal=True):
+    """Returns (leaf count, seconds) of a perft from `fen`"""
+    board = chessEngine.Board.from_FEN(fen)
+    start = time.perf_counter()
+    nodes = perft(board, depth, legal)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(max_depth, out=sys.stdout, legal=True):
+    """Runs every reference position up to `max_depth` and compares with the known counts
+
+    Returns:
+        int: number of wrong counts
+    """
+    errors = 0
+    total_nodes, total_time = 0, 0.0
+    for name, fen, counts in REFERENCE_POSITIONS:
+        for depth in range(1, min(max_depth, len(counts)) + 1):
+            nodes, seconds = timed_perft(fen, depth, legal)
+            total_nodes += nodes
+            total_time += seconds
+            status = "ok" if nodes == counts[depth - 1] else f"FAIL, expected {counts[depth - 1]}"
+            if nodes != counts[depth - 1]:
+                errors += 1
+            print(f"{name:<12} depth {depth}: {nodes:>10} nodes {seconds:8.2f}s  {status}", file=out)
+    print(f"total {total_nodes} nodes in {total_time:.2f}s, {total_nodes / max(total_time, 1e-9):.0f} nodes/s",
+          file=out)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft move generator test and benchmark")
+    parser.add_argument("fen", nargs="?", default=START_FEN, help="position to count from")
+    parser.add_argument("--depth", type=int, default=3, help="depth in plies")
+    parser.add_argument("--divide", action="store_true", help="print the count of every root move")
+    parser.add_argument("--suite", action="store_true", help="check all reference positions up to --depth")
+    parser.add_argument("--pseudo", action="store_true", help="count with the pseudo-legal generator instead")
+    args = parser.parse_args()
+
+    if args.suite:
+        sys.exit(1 if run_suite(args.depth, legal=not args.pseudo) else 0)
+    board = chessEngine.Board.from_FEN(args.fen)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(board, args.depth, not args.pseudo)
+        for name, nodes in counts:
+            print(f"{name}: {nodes}")
+        nodes = sum(nodes for _, nodes in counts)
+    else:
+        nodes = perft(board, args.depth, not args.pseudo)
+    seconds = time.perf_counter() - start
+    print(f"nodes {nodes}  time {seconds:.2f}s  {nodes / max(seconds, 1e-9):.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#########################################################
+#                                                       #
+#    Precomputed attack and ray tables, built once      #
+#    at import. Squares are numbered row * 8 + col,     #
+#    colours are indexed 0 - white, 1 - black           #
+#                                                       #
+#########################################################
+
+# ray directions as (row step, col step)
+NORTH, SOUTH, EAST, WEST, NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST = range(8)
+DIRECTION_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+ROOK_RAYS = (NORTH, SOUTH, EAST, WEST)
+BISHOP_RAYS = (NORTH_EAST, NORTH_WEST, SOUTH_EAST, SOUTH_WEST)
+QUEEN_RAYS = ROOK_RAYS + BISHOP_RAYS
+# rays that run towards higher square numbers: the nearest blocker is the lowest set bit
+POSITIVE_RAYS = (NORTH, EAST, NORTH_EAST, NORTH_WEST)
+
+KNIGHT_STEPS = ((2, 1), (2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2), (-2, 1), (-2, -1))
+KING_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def _on_board(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
+
+
+def _targets(steps):
+    """For every square returns the tuple of (row, col) reachable by one of `steps`"""
+    return tuple(tuple((square // 8 + dr, square % 8 + dc) for dr, dc in steps
+                       if _on_board(square // 8 + dr, square % 8 + dc))
+                 for square in range(64))
+
+
+def _mask(targets):
+    """Turns a tuple of (row, col) into a bitboard"""
+    bb = 0
+    for row, col in targets:
+        bb |= 1 << (row * 8 + col)
+    return bb
+
+
+def _ray(square, direction):
+    """Returns the squares of a ray from `square`, nearest first, as (row, col)"""
+    dr, dc = DIRECTION_STEPS[direction]
+    row, col = square // 8 + dr, square % 8 + dc
+    ray = []
+    while _on_board(row, col):
+        ray.append((row, col))
+        row, col = row + dr, col + dc
+    return tuple(ray)
+
+
+def _pawn_pushes(color, square):
+    row, col = square // 8, square % 8
+    step, start_row = (1, 1) if color == 0 else (-1, 6)
+    if not _on_board(row + step, col):
+        return ()
+    if row == start_row:
+        return (row + step, col), (row + 2 * step, col)
+    return ((row + step, col),)
+
+
+def _pawn_captures(color, square):
+    row, col = square // 8, square % 8
+    step = 1 if color == 0 else -1
+    return tuple((row + step, col + dc) for dc in (-1, 1) if _on_board(row + step, col + dc))
+
+
+KNIGHT_TARGETS = _targets(KNIGHT_STEPS)
+KING_TARGETS = _targets(KING_STEPS)
+KNIGHT_ATTACKS = tuple(_mask(targets) for targets in KNIGHT_TARGETS)
+KING_ATTACKS = tuple(_mask(targets) for targets in KING_TARGETS)
+
+# single and double pushes in walking order, a push is blocked by the first occupied square
+PAWN_PUSH_TARGETS = tuple(tuple(_pawn_pushes(color, square) for square in range(64)) for color in (0, 1))
+PAWN_PUSHES = tuple(tuple(_mask(targets[:1]) for targets in PAWN_PUSH_TARGETS[color]) for color in (0, 1))
+PAWN_CAPTURE_TARGETS = tuple(tuple(_pawn_captures(color, square) for square in range(64)) for color in (0, 1))
+PAWN_ATTACKS = tuple(tuple(_mask(targets) for targets in PAWN_CAPTURE_TARGETS[color]) for color in (0, 1))
+
+RAYS = tuple(tuple(_ray(square, direction) for square in range(64)) for direction in range(8))
+RAY_MASKS = tuple(tuple(_mask(ray) for ray in RAYS[direction]) for direction in range(8))
+OPPOSITE = (SOUTH, NORTH, WEST, EAST, SOUTH_WEST, SOUTH_EAST, NORTH_WEST, NORTH_EAST)
+
+
+def _between_and_line():
+    """BETWEEN[a][b]: squares strictly between two aligned squares, LINE[a][b]: the whole line through them"""
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for square in range(64):
+        for direction in range(8):
+            full = RAY_MASKS[direction][square] | RAY_MASKS[OPPOSITE[direction]][square] | 1 << square
+            passed = 0
+            for row, col in RAYS[direction][square]:
+                target = row * 8 + col
+                between[square][target] = passed
+                line[square][target] = full
+                passed |= 1 << target
+    return tuple(map(tuple, between)), tuple(map(tuple, line))
+
+
+BETWEEN, LINE = _between_and_line()
+
+
+def ray_attacks(square, occupied, directions):
+    """Returns the attack set of a slider on `square` along `directions`
+
+    Each ray is looked up whole and cut behind its nearest blocker.
+    """
+    attacks = 0
+    for direction in directions:
+        ray = RAY_MASKS[direction][square]
+        blockers = ray & occupied
+        if blockers:
+            if direction in POSITIVE_RAYS:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= RAY_MASKS[direction][blocker]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    return ray_attacks(square, occupied, ROOK_RAYS)
+
+
+def bishop_attacks(square, occupied):
+    return ray_attacks(square, occupied, BISHOP_RAYS)
+
+
+def queen_attacks(square, occupied):
+    return ray_attacks(square, occupied, QUEEN_RAYS)
@@ -278,8 +278,12 @@ class App(customtkinter.CTk):
     SQ_SIZE = B_HEIGHT / DIMENSION          # the size of each of the sWPquares in the board
     PIECE_DIR = "Assets/PiecesModern/"      # Standard piece Image Folder
     PIECE_SIZE = 48
+    BOT_MOVE_TIME = 2.0                     # seconds the bot thinks about a move
+    BOT_NODE_LIMIT = 200000                 # hard cap on the nodes the bot searches for a move (per worker)
+    BOT_WORKERS = 1                         # Lazy SMP search processes, 1 searches in the bot thread (see GameTree.lazy_smp)
     # virtual board
     board: chessEngine.Board = None
+    bot_stop: threading.Event = None        # stop token of the running bot search
     # profile info
     global USERNAME
     global PASSWORD
@@ -492,6 +496,7 @@ class App(customtkinter.CTk):
                     self.ButtonFieldSign[i][j].grid(row=7-i, column=0, sticky="sw", padx=0, pady=0)
             self.RecolorBoard()
             self.board = chessEngine.Board()
+            self.search_context = chessLogic.SearchContext()  # with BOT_WORKERS = 1 the bot keeps its tables for the whole game, lazy_smp starts from an empty table every move
             self.UpdateBoard()
             for i, j in itertools.product(range(8), range(8)):
                 self.ButtonField[i][j].configure(command = lambda row=i,col=j: self.ButtonField_event(row,col))
@@ -677,6 +682,8 @@ class App(customtkinter.CTk):
     #                                                       #
     #########################################################
     def on_closing(self, event=0):
+        if self.bot_stop is not None:
+            self.bot_stop.set() # the bot search ends within milliseconds
         self.destroy()
     def start(self):
         self.mainloop()
@@ -707,22 +714,49 @@ class App(customtkinter.CTk):
     #    threaded bot turn function    #
     #                                  #
     ####################################
+    def bot_info(self, info):
+        self.title(f"Игра в Шахматы - бот: глубина {info['depth']}, оценка {info['score'] / 100:+.2f}, {info['nps']} поз/с")
+    GAME_OVER_NAMES = {chessEngine.CHECKMATE: "мат", chessEngine.STALEMATE: "пат", chessEngine.KING_CAPTURED: "король взят",
+                       chessEngine.FIFTY_MOVE_DRAW: "ничья по правилу 50 ходов", chessEngine.INSUFFICIENT_MATERIAL: "ничья, недостаточно материала"}
+    def game_over(self):
+        ''' Shows the result in the window title and returns True once the game has ended '''
+        status = self.board.game_status()
+        if status not in App.GAME_OVER_NAMES:
+            return False
+        self.title(f"Игра в Шахматы - игра окончена: {App.GAME_OVER_NAMES[status]}")
+        return True
     def thread(self):
+        stop = self.bot_stop = threading.Event()
         def _bot_turn():
             try:
+                if self.game_over():
+                    return # the player's move ended the game, the bot has nothing to play
                 for i, j in itertools.product(range(8), range(8)):
                     self.ButtonField[i][j].configure(state="disabled")
 
-                game_tree = chessLogic.GameTree(self.board.get_FEN(),False)
-                game_tree.alpha_beta_evaluation(3)
-                move,_ = game_tree.suggest_move()
-                self.board.move_piece(self.board.get_piece_arr()[move[0][0]][move[0][1]],chessEngine.Position(move[1][0],move[1][1]))
-                self.ButtonField[move[0][0]][move[0][1]].configure(image = None)
+                game_tree = chessLogic.GameTree(self.board.get_FEN(),False,retain_tree=False,context=self.search_context)
+                if App.BOT_WORKERS > 1:
+                    move,_,_ = game_tree.lazy_smp(App.BOT_WORKERS, move_time=App.BOT_MOVE_TIME, max_nodes=App.BOT_NODE_LIMIT, stop=stop, on_info=self.bot_info)
+                else:
+                    move,_,_ = game_tree.iterative_deepening(move_time=App.BOT_MOVE_TIME, max_nodes=App.BOT_NODE_LIMIT, stop=stop, on_info=self.bot_info)
+                if stop.is_set():
+                    return # the window was closed, there is nothing to move on
+                if move == chessEngine.NULL_MOVE:
+                    self.game_over()
+                    return
+                self.title("Игра в Шахматы")
+                from_square, to_square = chessEngine.move_from(move), chessEngine.move_to(move)
+                self.board.move_piece(self.board.mailbox[from_square],chessEngine.Position.at(to_square),chessEngine.move_promotion(move) or chessEngine.QUEEN)
+                self.ButtonField[from_square >> 3][from_square & 7].configure(image = None)
                 self.UpdateBoard()
+                if self.game_over():
+                    return # the bot's move ended the game, the board stays locked
 
                 for i, j in itertools.product(range(8), range(8)):
                     self.ButtonField[i][j].configure(state="normal")
             except Exception as e:
+                if stop.is_set():
+                    return
                 print(e)
                 for i, j in itertools.product(range(8), range(8)):
                     self.ButtonField[i][j].configure(state="normal")
@@ -756,8 +790,7 @@ class App(customtkinter.CTk):
     #     self.ButtonFieldSign[row][1].configure(fg_color=(App.Colors.HighlightedSigns,App.Colors.HighlightedSigns))
     def ButtonField_event(self,row,col):
         ''' Some of the functions from chessEngine.py used:
-        correct_moves - list of moves that a piece can operate on - except for those in which it is possible to capture the enemy
-        correct_captures - list of all possible captures of enemy pieces
+        legal_targets - legal moves and legal captures of the selected piece
         move_piece - piece moving
         '''
         self.RecolorBoard()
@@ -776,8 +809,7 @@ class App(customtkinter.CTk):
             App.SelectedButtonField.selected = True
             App.SelectedButtonField.row = row
             App.SelectedButtonField.col = col
-            correct_moves = piece.correct_moves(arr)
-            correct_captures = piece.correct_captures(arr)
+            correct_moves, correct_captures = self.board.legal_targets(piece.position)
             for move in correct_moves:
                 self.ButtonField[move.row][move.col].configure(fg_color=(App.Colors.Field_Correct_Move, App.Colors.Field_Correct_Move))
             for capture in correct_captures:
@@ -827,10 +859,7 @@ class App(customtkinter.CTk):
     ###############################################################
     def SelectedField(self):
         if App.SelectedButtonField.selected == True:
-            position = chessEngine.Position
-            position.row = App.SelectedButtonField.row
-            position.col = App.SelectedButtonField.col
-            return position
+            return chessEngine.Position(App.SelectedButtonField.row, App.SelectedButtonField.col)
         # if clicked piece has the same color as selected one
         # elif App.SelectedButtonField.selected == False and ...: 
             # position = chessEngine.Position